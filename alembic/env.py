@@ -1,3 +1,4 @@
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config, pool
@@ -13,6 +14,10 @@ config = context.config
 if context.config.config_file_name is not None:
     fileConfig(context.config.config_file_name)
 
+# DATABASE_URL from the environment wins over alembic.ini, as in the app settings
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"])
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
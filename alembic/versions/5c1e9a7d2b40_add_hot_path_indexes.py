@@ -0,0 +1,48 @@
+"""Add hot path indexes
+
+Revision ID: 5c1e9a7d2b40
+Revises: 43bc7adb8887
+Create Date: 2026-10-18 10:42:17.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d2b40'
+down_revision: Union[str, None] = '43bc7adb8887'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_category_id_id', 'products', ['category_id', 'id'], unique=False)
+    op.create_index('ix_products_subcategory_id_id', 'products', ['subcategory_id', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index(
+        'ix_products_unavailable_sold_date', 'products', ['sold_date', 'category_id'], unique=False,
+        postgresql_where=sa.text('is_available = false'),
+        sqlite_where=sa.text('is_available = 0'),
+    )
+    op.create_index(op.f('ix_subcategories_category_id'), 'subcategories', ['category_id'], unique=False)
+    op.create_index(op.f('ix_sales_product_id'), 'sales', ['product_id'], unique=False)
+    op.create_index(op.f('ix_sales_sale_date'), 'sales', ['sale_date'], unique=False)
+    op.create_index(op.f('ix_discounts_product_id'), 'discounts', ['product_id'], unique=False)
+    op.create_index(op.f('ix_discounts_category_id'), 'discounts', ['category_id'], unique=False)
+    op.create_index(op.f('ix_discounts_subcategory_id'), 'discounts', ['subcategory_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_discounts_subcategory_id'), table_name='discounts')
+    op.drop_index(op.f('ix_discounts_category_id'), table_name='discounts')
+    op.drop_index(op.f('ix_discounts_product_id'), table_name='discounts')
+    op.drop_index(op.f('ix_sales_sale_date'), table_name='sales')
+    op.drop_index(op.f('ix_sales_product_id'), table_name='sales')
+    op.drop_index(op.f('ix_subcategories_category_id'), table_name='subcategories')
+    op.drop_index('ix_products_unavailable_sold_date', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_subcategory_id_id', table_name='products')
+    op.drop_index('ix_products_category_id_id', table_name='products')
@@ -0,0 +1,68 @@
+"""Add product name search indexes
+
+Revision ID: 8f3b2d6a1c57
+Revises: 5c1e9a7d2b40
+Create Date: 2026-10-18 14:05:51.602417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b2d6a1c57'
+down_revision: Union[str, None] = '5c1e9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER products_search_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); "
+    "INSERT INTO products_trgm(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER products_search_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO products_trgm(products_trgm, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER products_search_au AFTER UPDATE OF name ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO products_trgm(products_trgm, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); "
+    "INSERT INTO products_trgm(rowid, name) VALUES (new.id, new.name); END",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_products_name_trgm ON products USING gin (name gin_trgm_ops)")
+        op.execute(
+            "CREATE INDEX ix_products_name_tsv ON products USING gin (to_tsvector('simple', coalesce(name, '')))"
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE products_fts USING fts5("
+            "name, content='products', content_rowid='id', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE products_trgm USING fts5("
+            "name, content='products', content_rowid='id', tokenize='trigram')"
+        )
+        # Index the existing rows; the triggers keep both tables in step from here on
+        op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+        op.execute("INSERT INTO products_trgm(products_trgm) VALUES ('rebuild')")
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(trigger)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_products_name_tsv")
+        op.execute("DROP INDEX IF EXISTS ix_products_name_trgm")
+    elif dialect == 'sqlite':
+        for trigger in ("products_search_au", "products_search_ad", "products_search_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_trgm")
+        op.execute("DROP TABLE IF EXISTS products_fts")
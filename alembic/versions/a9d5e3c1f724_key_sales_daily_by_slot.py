@@ -0,0 +1,60 @@
+"""Key sales_daily by stock slot
+
+Revision ID: a9d5e3c1f724
+Revises: f3c7d9a2b618
+Create Date: 2026-10-18 22:41:09.537120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d5e3c1f724'
+down_revision: Union[str, None] = 'f3c7d9a2b618'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "sale_date, product_id, category_id, subcategory_id, units, gross_revenue, net_revenue"
+
+
+def _rebuild(slotted: bool, copy: str) -> None:
+    # SQLite cannot change a primary key in place: build the new table, copy the rollup over, swap
+    key = ['sale_date', 'product_id'] + (['slot'] if slotted else [])
+    op.create_table(
+        'sales_daily_rebuilt',
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        *([sa.Column('slot', sa.Integer(), nullable=False)] if slotted else []),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('subcategory_id', sa.Integer(), nullable=True),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('gross_revenue', sa.Float(), nullable=False),
+        sa.Column('net_revenue', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.ForeignKeyConstraint(['subcategory_id'], ['subcategories.id']),
+        sa.PrimaryKeyConstraint(*key)
+    )
+    op.execute(copy)
+    op.drop_index('ix_sales_daily_subcategory_id_sale_date', table_name='sales_daily')
+    op.drop_index('ix_sales_daily_category_id_sale_date', table_name='sales_daily')
+    op.drop_table('sales_daily')
+    op.rename_table('sales_daily_rebuilt', 'sales_daily')
+    op.create_index('ix_sales_daily_category_id_sale_date', 'sales_daily', ['category_id', 'sale_date'], unique=False)
+    op.create_index('ix_sales_daily_subcategory_id_sale_date', 'sales_daily', ['subcategory_id', 'sale_date'], unique=False)
+
+
+def upgrade() -> None:
+    # Existing rows become slot 0, where unsharded products keep rolling up
+    _rebuild(True, f"INSERT INTO sales_daily_rebuilt ({COLUMNS}, slot) SELECT {COLUMNS}, 0 FROM sales_daily")
+
+
+def downgrade() -> None:
+    _rebuild(False, (
+        f"INSERT INTO sales_daily_rebuilt ({COLUMNS}) "
+        "SELECT sale_date, product_id, MIN(category_id), MIN(subcategory_id), SUM(units), "
+        "SUM(gross_revenue), SUM(net_revenue) FROM sales_daily GROUP BY sale_date, product_id"
+    ))
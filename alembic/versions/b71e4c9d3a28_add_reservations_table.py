@@ -0,0 +1,65 @@
+"""Add reservations table
+
+Revision ID: b71e4c9d3a28
+Revises: 8f3b2d6a1c57
+Create Date: 2026-10-18 15:32:08.114630
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e4c9d3a28'
+down_revision: Union[str, None] = '8f3b2d6a1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Hold already reserved units for the default TTL from the time of the upgrade
+BACKFILL_TTL = timedelta(seconds=900)
+
+
+def upgrade() -> None:
+    reservations = op.create_table(
+        'reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('holder', sa.String(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reservations_id'), 'reservations', ['id'], unique=False)
+    op.create_index(op.f('ix_reservations_product_id'), 'reservations', ['product_id'], unique=False)
+    op.create_index(op.f('ix_reservations_holder'), 'reservations', ['holder'], unique=False)
+    op.create_index(op.f('ix_reservations_expires_at'), 'reservations', ['expires_at'], unique=False)
+
+    # products.reserved_quantity must equal the sum of its reservations from now on
+    now = datetime.utcnow()
+    reserved = op.get_bind().execute(
+        sa.text("SELECT id, reserved_quantity FROM products WHERE reserved_quantity > 0")
+    ).all()
+    if reserved:
+        op.bulk_insert(reservations, [
+            {
+                'product_id': product_id,
+                'holder': None,
+                'quantity': quantity,
+                'created_at': now,
+                'expires_at': now + BACKFILL_TTL,
+            }
+            for product_id, quantity in reserved
+        ])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reservations_expires_at'), table_name='reservations')
+    op.drop_index(op.f('ix_reservations_holder'), table_name='reservations')
+    op.drop_index(op.f('ix_reservations_product_id'), table_name='reservations')
+    op.drop_index(op.f('ix_reservations_id'), table_name='reservations')
+    op.drop_table('reservations')
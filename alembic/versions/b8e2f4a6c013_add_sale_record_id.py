@@ -0,0 +1,29 @@
+"""Add sale record id
+
+Revision ID: b8e2f4a6c013
+Revises: a9d5e3c1f724
+Create Date: 2026-10-18 23:52:17.084613
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2f4a6c013'
+down_revision: Union[str, None] = 'a9d5e3c1f724'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing sales keep NULL, which never conflicts
+    op.add_column('sales', sa.Column('record_id', sa.String(length=32), nullable=True))
+    op.create_index(op.f('ix_sales_record_id'), 'sales', ['record_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_sales_record_id'), table_name='sales')
+    op.drop_column('sales', 'record_id')
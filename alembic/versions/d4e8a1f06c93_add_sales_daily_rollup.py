@@ -0,0 +1,53 @@
+"""Add sales_daily rollup
+
+Revision ID: d4e8a1f06c93
+Revises: b71e4c9d3a28
+Create Date: 2026-10-18 17:05:41.302518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8a1f06c93'
+down_revision: Union[str, None] = 'b71e4c9d3a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sales_daily',
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('subcategory_id', sa.Integer(), nullable=True),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('gross_revenue', sa.Float(), nullable=False),
+        sa.Column('net_revenue', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.ForeignKeyConstraint(['subcategory_id'], ['subcategories.id']),
+        sa.PrimaryKeyConstraint('sale_date', 'product_id')
+    )
+    op.create_index('ix_sales_daily_category_id_sale_date', 'sales_daily', ['category_id', 'sale_date'], unique=False)
+    op.create_index('ix_sales_daily_subcategory_id_sale_date', 'sales_daily', ['subcategory_id', 'sale_date'], unique=False)
+
+    # Backfill from existing sales in one set-based statement (backfill_sales_daily.py can rebuild ranges later)
+    op.execute(
+        "INSERT INTO sales_daily "
+        "(sale_date, product_id, category_id, subcategory_id, units, gross_revenue, net_revenue) "
+        "SELECT s.sale_date, s.product_id, p.category_id, p.subcategory_id, COUNT(s.id), "
+        "SUM(s.actual_price), SUM(COALESCE(s.discounted_price, s.actual_price)) "
+        "FROM sales s JOIN products p ON p.id = s.product_id "
+        "GROUP BY s.sale_date, s.product_id, p.category_id, p.subcategory_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sales_daily_subcategory_id_sale_date', table_name='sales_daily')
+    op.drop_index('ix_sales_daily_category_id_sale_date', table_name='sales_daily')
+    op.drop_table('sales_daily')
@@ -0,0 +1,46 @@
+"""Add stock shards
+
+Revision ID: e6b2c8d47a15
+Revises: d4e8a1f06c93
+Create Date: 2026-10-18 18:42:13.557904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b2c8d47a15'
+down_revision: Union[str, None] = 'd4e8a1f06c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stock_shards',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('slot', sa.Integer(), nullable=False),
+        sa.Column('stock', sa.Integer(), nullable=False),
+        sa.Column('reserved_quantity', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id', 'slot')
+    )
+    op.add_column('products', sa.Column('shard_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('reservations', sa.Column('slot', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    # Fold sharded stock back into the product rows before the slots go away
+    op.execute(
+        "UPDATE products SET "
+        "stock = stock + (SELECT COALESCE(SUM(s.stock), 0) FROM stock_shards s WHERE s.product_id = products.id), "
+        "reserved_quantity = reserved_quantity + "
+        "(SELECT COALESCE(SUM(s.reserved_quantity), 0) FROM stock_shards s WHERE s.product_id = products.id) "
+        "WHERE shard_count > 0"
+    )
+    op.drop_column('reservations', 'slot')
+    op.drop_column('products', 'shard_count')
+    op.drop_table('stock_shards')
@@ -0,0 +1,28 @@
+"""Add product original price
+
+Revision ID: f3c7d9a2b618
+Revises: e6b2c8d47a15
+Create Date: 2026-10-18 20:05:41.218374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7d9a2b618'
+down_revision: Union[str, None] = 'e6b2c8d47a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('original_price', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    # End running promotions so no product is left at its promotional price
+    op.execute("UPDATE products SET price = original_price WHERE original_price IS NOT NULL")
+    op.drop_column('products', 'original_price')
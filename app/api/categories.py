@@ -1,24 +1,37 @@
 # app/api/categories.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
-from app.db import models
-from app.db.database import get_db
-from app.schemas import CategoryCreate, CategoryResponse
-from typing import List
+from app.core.read_your_writes import wrote_recently
+from app.db.database import get_db, get_read_db, run_db
+from app.core.serialization import FastJSONResponse
+from app.schemas import CategoryCreate, CategoryResponse, CategoryTreeNode
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.categories_service import (
+    create_category as create_category_record, get_category_page, get_category_tree
+)
+from typing import List, Literal, Optional
 
 router = APIRouter()
 
 @router.post("/", response_model=CategoryResponse)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
-    db_category = db.query(models.Category).filter(models.Category.name == category.name).first()
-    if db_category:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category already exists")
-    new_category = models.Category(name=category.name)
-    db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
-    return new_category
+async def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+    return await run_db(db, create_category_record, category.name)
 
 @router.get("/", response_model=List[CategoryResponse])
-def read_categories(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return db.query(models.Category).offset(skip).limit(limit).all()
+async def read_categories(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(10, ge=1),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "name"] = "id",
+    db: Session = Depends(get_read_db)
+):
+    categories, next_cursor = await run_db(db, get_category_page, limit=limit, cursor=cursor, sort=sort, skip=skip)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return categories
+
+@router.get("/tree", response_model=List[CategoryTreeNode], response_class=FastJSONResponse)
+async def read_category_tree(request: Request, db: Session = Depends(get_read_db)):
+    # A client that just wrote gets a tree built on the primary, not another worker's older copy
+    return await run_db(db, get_category_tree, cached=not wrote_recently(request))
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..core.metrics import metrics
+from ..db.database import get_pool_stats
+
+router = APIRouter()
+
+@router.get("/monitoring/pool")
+async def read_pool_stats():
+    return get_pool_stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,74 +1,207 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import tempfile
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from ..db.database import SessionLocal
+from ..core.serialization import RowSerializer
+from ..db import models
+from ..core.read_your_writes import wrote_recently
+from ..db.database import get_db, get_read_db, read_sessionmaker, run_db
 from ..services.products_service import (
-    get_product_list, create_product, update_product_price, 
+    get_product_page, create_product, update_product_price,
     reserve_product, cancel_reservation, sell_product,
-    start_promotion, get_sold_products, get_product_or_404
+    start_promotion, end_promotion, start_bulk_promotion, end_bulk_promotion,
+    get_sold_products, get_product_data, remove_product, reserve_cart, sell_cart, set_stock_shards
+)
+from ..services.pagination import NEXT_CURSOR_HEADER
+from ..services.export_service import product_export_query, sold_product_export_query, export_response
+from ..services.import_service import import_feed, IMPORT_BATCH_SIZE
+from ..services.product_cache import product_cache
+from ..services.search_service import search_products
+from ..services.stock_shards import MAX_SHARDS, total_columns
+from ..schemas import (
+    ProductCreate, ProductUpdatePrice, ProductResponse, CartRequest, ProductImportReport, PromotionRequest,
+    PromotionReport
 )
-from ..schemas import ProductCreate, ProductUpdatePrice, ProductResponse
 from datetime import date
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# List routes fetch only the response columns and serialize them in one pass
+product_rows = RowSerializer(ProductResponse)
+product_columns = total_columns(product_rows.columns(models.Product))
+
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
 
 @router.get("/", response_model=List[ProductResponse])
-def read_products(
+async def read_products(
     skip: int = 0,
-    limit: int = 10,
+    limit: int = Query(10, ge=1),
     category_id: Optional[int] = None,
     subcategory_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    sort: Literal["id", "name", "price"] = "id",
+    db: Session = Depends(get_read_db)
+):
+    rows, next_cursor = await run_db(
+        db, get_product_page, limit=limit, cursor=cursor, sort=sort, skip=skip,
+        category_id=category_id, subcategory_id=subcategory_id, columns=product_columns
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor is not None else None
+    return product_rows.response(rows, headers=headers)
+
+@router.get("/export")
+async def export_products(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None
+):
+    query = product_export_query(category_id=category_id, subcategory_id=subcategory_id)
+    return export_response(query, format, "products", read_sessionmaker(request))
+
+@router.get("/sold/export")
+async def export_sold_products(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None
 ):
-    return get_product_list(db, skip=skip, limit=limit, category_id=category_id, subcategory_id=subcategory_id)
+    query = sold_product_export_query(start_date=start_date, end_date=end_date, category_id=category_id)
+    return export_response(query, format, "sold_products", read_sessionmaker(request))
+
+@router.get("/cache/stats")
+async def read_product_cache_stats():
+    return product_cache.stats()
+
+@router.get("/search", response_model=List[ProductResponse])
+async def search_product_names(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: Literal["prefix", "substring", "fuzzy"] = "substring",
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    rows, next_cursor = await run_db(
+        db, search_products, q, mode=mode, limit=limit, cursor=cursor,
+        category_id=category_id, subcategory_id=subcategory_id, columns=product_columns
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor is not None else None
+    return product_rows.response(rows, headers=headers)
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def read_product(product_id: int, db: Session = Depends(get_db)):
-    return get_product_or_404(db, product_id)
+async def read_product(product_id: int, request: Request, db: Session = Depends(get_read_db)):
+    # Hits are answered on the event loop without touching the database. A client that just wrote
+    # skips the cache, which another worker may not have invalidated yet, and reads the primary
+    if not wrote_recently(request):
+        cached = product_cache.get(product_id)
+        if cached is not None:
+            return cached
+    return await run_db(db, get_product_data, product_id)
 
 @router.post("/", response_model=ProductResponse)
-def add_product(product_data: ProductCreate, db: Session = Depends(get_db)):
-    return create_product(db, product_data.model_dump())
+async def add_product(product_data: ProductCreate, db: Session = Depends(get_db)):
+    return await run_db(db, create_product, product_data.model_dump())
+
+@router.post("/import", response_model=ProductImportReport)
+async def import_product_feed(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1)
+):
+    # Spool the upload (to disk past IMPORT_SPOOL_SIZE) so large feeds never sit in memory
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as feed:
+        async for chunk in request.stream():
+            feed.write(chunk)
+        feed.seek(0)
+        return await run_in_threadpool(import_feed, feed, format, batch_size)
+
+@router.post("/promotions", response_model=PromotionReport)
+async def start_products_promotion(promotion: PromotionRequest, db: Session = Depends(get_db)):
+    return await run_db(
+        db, start_bulk_promotion, promotion.discount,
+        category_id=promotion.category_id, subcategory_id=promotion.subcategory_id
+    )
+
+# Declared before DELETE /{product_id}, which would otherwise match the path
+@router.delete("/promotions", response_model=PromotionReport)
+async def end_products_promotion(
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    return await run_db(db, end_bulk_promotion, category_id=category_id, subcategory_id=subcategory_id)
 
 @router.patch("/{product_id}/price", response_model=ProductResponse)
-def change_price(product_id: int, update_data: ProductUpdatePrice, db: Session = Depends(get_db)):
-    return update_product_price(db, product_id, update_data.new_price)
+async def change_price(product_id: int, update_data: ProductUpdatePrice, db: Session = Depends(get_db)):
+    return await run_db(db, update_product_price, product_id, update_data.new_price)
 
 @router.delete("/{product_id}", response_model=ProductResponse)
-def delete_product(product_id: int, db: Session = Depends(get_db)):
-    product = get_product_or_404(db, product_id)
-    db.delete(product)
-    db.commit()
-    return product
+async def delete_product(product_id: int, db: Session = Depends(get_db)):
+    return await run_db(db, remove_product, product_id)
+
+@router.post("/cart/reserve", response_model=List[ProductResponse])
+async def reserve_cart_items(cart: CartRequest, db: Session = Depends(get_db)):
+    items = [(item.product_id, item.quantity) for item in cart.items]
+    return await run_db(db, reserve_cart, items, cart.holder)
+
+@router.post("/cart/sell", response_model=List[ProductResponse])
+async def sell_cart_items(cart: CartRequest, db: Session = Depends(get_db)):
+    items = [(item.product_id, item.quantity) for item in cart.items]
+    return await run_db(db, sell_cart, items, cart.holder)
 
 @router.post("/{product_id}/reserve", response_model=ProductResponse)
-def reserve_item(product_id: int, db: Session = Depends(get_db)):
-    return reserve_product(db, product_id)
+async def reserve_item(
+    product_id: int,
+    holder: Optional[str] = Query(None, max_length=100),
+    db: Session = Depends(get_db)
+):
+    return await run_db(db, reserve_product, product_id, holder)
 
 @router.delete("/{product_id}/cancel-reservation", response_model=ProductResponse)
-def cancel_item_reservation(product_id: int, db: Session = Depends(get_db)):
-    return cancel_reservation(db, product_id)
+async def cancel_item_reservation(
+    product_id: int,
+    holder: Optional[str] = Query(None, max_length=100),
+    db: Session = Depends(get_db)
+):
+    return await run_db(db, cancel_reservation, product_id, holder)
 
 @router.post("/{product_id}/sell", response_model=ProductResponse)
-def sell_item(product_id: int, db: Session = Depends(get_db)):
-    return sell_product(db, product_id)
+async def sell_item(
+    product_id: int,
+    holder: Optional[str] = Query(None, max_length=100),
+    db: Session = Depends(get_db)
+):
+    return await run_db(db, sell_product, product_id, holder)
+
+@router.patch("/{product_id}/stock-shards", response_model=ProductResponse)
+async def change_stock_shards(
+    product_id: int,
+    shards: int = Query(..., ge=0, le=MAX_SHARDS),
+    db: Session = Depends(get_db)
+):
+    return await run_db(db, set_stock_shards, product_id, shards)
 
 @router.patch("/{product_id}/start-promotion", response_model=ProductResponse)
-def apply_discount(product_id: int, discount: float, db: Session = Depends(get_db)):
-    return start_promotion(db, product_id, discount)
+async def apply_discount(product_id: int, discount: float, db: Session = Depends(get_db)):
+    return await run_db(db, start_promotion, product_id, discount)
+
+@router.patch("/{product_id}/end-promotion", response_model=ProductResponse)
+async def remove_discount(product_id: int, db: Session = Depends(get_db)):
+    return await run_db(db, end_promotion, product_id)
 
 @router.get("/sold/", response_model=List[ProductResponse])
-def get_sold_products_report(
+async def get_sold_products_report(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     category_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    return get_sold_products(db, start_date=start_date, end_date=end_date, category_id=category_id)
\ No newline at end of file
+    rows = await run_db(
+        db, get_sold_products, start_date=start_date, end_date=end_date, category_id=category_id,
+        columns=product_columns
+    )
+    return product_rows.response(rows)
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
+from ..core.serialization import FastJSONResponse
+from ..db.database import get_read_db, read_sessionmaker, run_db
+from ..services.sales_service import get_sales_report
+from ..services.export_service import sale_export_query, export_response
+from ..schemas import SalesReportRow
+from datetime import date
+from typing import Optional, List, Literal
+
+router = APIRouter()
+
+@router.get(
+    "/report", response_model=List[SalesReportRow], response_model_exclude_none=True, response_class=FastJSONResponse
+)
+async def read_sales_report(
+    group_by: List[Literal["day", "category", "subcategory", "product"]] = Query(["day"]),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    return await run_db(
+        db, get_sales_report, group_by,
+        start_date=start_date, end_date=end_date,
+        category_id=category_id, subcategory_id=subcategory_id
+    )
+
+@router.get("/export")
+async def export_sales(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None
+):
+    query = sale_export_query(
+        start_date=start_date, end_date=end_date,
+        category_id=category_id, subcategory_id=subcategory_id
+    )
+    return export_response(query, format, "sales", read_sessionmaker(request))
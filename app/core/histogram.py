@@ -0,0 +1,38 @@
+# app/core/histogram.py
+import bisect
+import threading
+from typing import Any, Dict, Sequence
+
+# Seconds; spans a fast pool checkout up to a request stuck behind a timeout
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed upper bounds, Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self) -> Dict[str, int]:
+        """Observations at or below each bound, keyed like Prometheus' ``le`` label."""
+        with self._lock:
+            counts = list(self._counts)
+        result, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            result["+Inf" if bound == float("inf") else repr(bound)] = running
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": self.sum, "buckets": self.cumulative()}
@@ -0,0 +1,172 @@
+# app/core/metrics.py
+import re
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .histogram import Histogram
+from typing import Callable, Dict, Iterable, List, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels) + "}"
+
+
+def format_metric(name: str, metric_type: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def format_histograms(name: str, help_text: str, histograms: Dict[Labels, Histogram]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms.items():
+        for bound, count in histogram.cumulative().items():
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {count}")
+        lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+    return lines
+
+
+class MetricsRegistry:
+    """Process-wide HTTP and SQL metrics, rendered in the Prometheus text format.
+
+    Other subsystems (connection pools, caches) plug in through `add_collector`,
+    a callable returning already formatted exposition lines.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency: Dict[Labels, Histogram] = {}
+        self.request_count: Dict[Labels, int] = {}
+        self.in_flight = 0
+        self.statement_latency: Dict[Labels, Histogram] = {}
+        self.statement_rows: Dict[Labels, int] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        self.sql_installed = False
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        self._collectors.append(collector)
+
+    def _histogram(self, histograms: Dict[Labels, Histogram], labels: Labels) -> Histogram:
+        histogram = histograms.get(labels)
+        if histogram is None:
+            with self._lock:
+                histogram = histograms.setdefault(labels, Histogram())
+        return histogram
+
+    def track_in_flight(self, delta: int) -> None:
+        with self._lock:
+            self.in_flight += delta
+
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        self._histogram(self.request_latency, (("method", method), ("route", route))).observe(seconds)
+        key = (("method", method), ("route", route), ("status", str(status_code)))
+        with self._lock:
+            self.request_count[key] = self.request_count.get(key, 0) + 1
+
+    def observe_statement(self, operation: str, table: str, seconds: float, rows: int) -> None:
+        labels = (("operation", operation), ("table", table))
+        self._histogram(self.statement_latency, labels).observe(seconds)
+        if rows >= 0:
+            with self._lock:
+                self.statement_rows[labels] = self.statement_rows.get(labels, 0) + rows
+
+    def render(self) -> str:
+        with self._lock:
+            request_latency = dict(self.request_latency)
+            request_count = list(self.request_count.items())
+            in_flight = self.in_flight
+            statement_latency = dict(self.statement_latency)
+            statement_rows = list(self.statement_rows.items())
+
+        lines: List[str] = []
+        lines += format_histograms("http_request_duration_seconds", "HTTP request latency by route.", request_latency)
+        lines += format_metric("http_requests_total", "counter", "HTTP responses by route and status.", request_count)
+        lines += format_metric("http_requests_in_flight", "gauge", "HTTP requests currently being served.", [((), in_flight)])
+        lines += format_histograms("db_statement_duration_seconds", "SQL statement execution time.", statement_latency)
+        lines += format_metric(
+            "db_statement_rows_total", "counter", "Rows reported by the driver for SQL statements.", statement_rows
+        )
+        for collector in self._collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: latency, status and in-flight count per route template."""
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        self.registry.track_in_flight(1)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.track_in_flight(-1)
+            # The router stores the matched route in the scope; the template keeps label cardinality bounded
+            route = scope.get("route")
+            self.registry.observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+                time.perf_counter() - start,
+            )
+
+
+def _statement_labels(statement: str) -> Tuple[str, str]:
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    match = _TABLE_PATTERN.search(statement)
+    return operation, match.group(1).lower() if match else ""
+
+
+def install_sql_metrics(registry: MetricsRegistry = metrics) -> None:
+    """Time every statement of every engine (async engines included, through their sync core)."""
+    if registry.sql_installed:
+        return
+    registry.sql_installed = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        operation, table = _statement_labels(statement)
+        # Drivers report -1 when they do not know (e.g. SQLite SELECTs); those are not counted
+        registry.observe_statement(operation, table, elapsed, cursor.rowcount)
+
+    @event.listens_for(Engine, "handle_error")
+    def _discard_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("metrics_query_start"):
+            connection.info["metrics_query_start"].pop()
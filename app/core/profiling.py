@@ -0,0 +1,138 @@
+# app/core/profiling.py
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+QUERY_TIME_HEADER = "X-Query-Time-Ms"
+REPEATED_QUERIES_HEADER = "X-Repeated-Queries"
+
+DEFAULT_REPEAT_THRESHOLD = 3
+
+
+class QueryProfile:
+    """Statements executed while the profile is active, with their timings.
+
+    The profile rides in a context variable, so it follows the request into
+    `run_in_threadpool` and `AsyncSession.run_sync` alike.
+    """
+
+    def __init__(self):
+        self.statements: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements.append((statement, seconds))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_time(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold: int = DEFAULT_REPEAT_THRESHOLD) -> Dict[str, int]:
+        """Statements whose SQL text ran at least ``threshold`` times: the N+1 signature."""
+        counts = Counter(statement for statement, _ in self.statements)
+        return {statement: count for statement, count in counts.items() if count >= threshold}
+
+    def report(self) -> str:
+        return "\n".join(f"  [{seconds * 1000:.2f} ms] {statement}" for statement, seconds in self.statements)
+
+
+# Every enclosing profile records, so a test budget still sees statements under the request middleware
+_active_profiles: ContextVar[Tuple[QueryProfile, ...]] = ContextVar("query_profiles", default=())
+_installed = False
+
+
+def install_query_profiler() -> None:
+    """Feed statements of every engine into the active profile, if any."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        if _active_profiles.get():
+            conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        profiles = _active_profiles.get()
+        if profiles and conn.info.get("profile_query_start"):
+            elapsed = time.perf_counter() - conn.info["profile_query_start"].pop()
+            for profile in profiles:
+                profile.record(statement, elapsed)
+
+    @event.listens_for(Engine, "handle_error")
+    def _discard_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("profile_query_start"):
+            connection.info["profile_query_start"].pop()
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    install_query_profiler()
+    profile = QueryProfile()
+    token = _active_profiles.set(_active_profiles.get() + (profile,))
+    try:
+        yield profile
+    finally:
+        _active_profiles.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryProfile]:
+    """Test helper: fail if the block runs more than ``limit`` SQL statements.
+
+        with assert_max_queries(2):
+            await ac.post(f"/products/{product_id}/sell")
+    """
+    with profile_queries() as profile:
+        yield profile
+    if profile.count > limit:
+        raise AssertionError(f"Expected at most {limit} queries, {profile.count} were run:\n{profile.report()}")
+
+
+class QueryProfilerMiddleware:
+    """Pure ASGI middleware adding per-request query count, DB time and N+1 warnings to the response headers.
+
+    Headers carry what ran before the response started; statements issued while
+    a streaming body is being sent are not included.
+    """
+
+    def __init__(self, app, repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as profile:
+            async def send_with_profile(message):
+                if message["type"] == "http.response.start":
+                    repeated = profile.repeated(self.repeat_threshold)
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.lower().encode(), str(profile.count).encode()))
+                    headers.append((QUERY_TIME_HEADER.lower().encode(), f"{profile.total_time * 1000:.2f}".encode()))
+                    headers.append((REPEATED_QUERIES_HEADER.lower().encode(), str(sum(repeated.values())).encode()))
+                    message = {**message, "headers": headers}
+                    for statement, count in repeated.items():
+                        logger.warning(
+                            "Possible N+1 on %s %s: statement ran %d times: %s",
+                            scope["method"], scope["path"], count, statement,
+                        )
+                await send(message)
+
+            await self.app(scope, receive, send_with_profile)
@@ -0,0 +1,41 @@
+import math
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+# Set on a client's successful writes; until its deadline (a Unix timestamp) the client's
+# reads go to the primary instead of a replica that may not have replayed the write yet
+PRIMARY_COOKIE = "db_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def wrote_recently(connection: HTTPConnection) -> bool:
+    """Whether the client's read-your-writes window from a previous write is still open."""
+    try:
+        return float(connection.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware: marks clients that just wrote so their reads stay on the primary for ``window`` seconds."""
+
+    def __init__(self, app, window: float):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                deadline = time.time() + self.window
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{PRIMARY_COOKIE}={deadline:.3f}; Max-Age={math.ceil(self.window)}; Path=/; HttpOnly; SameSite=lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
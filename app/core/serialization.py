@@ -0,0 +1,49 @@
+# app/core/serialization.py
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used without it
+    orjson = None
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+else:
+    FastJSONResponse = JSONResponse
+
+
+class RowSerializer:
+    """Fast list serialization for one response schema.
+
+    Services fetch just `columns(model)` (plain rows, no ORM identity map) and the
+    route returns `response(rows)` directly, skipping FastAPI's per-object
+    validation and the stdlib encoder. With ``validate=True`` rows still go
+    through a precompiled `TypeAdapter` and are dumped by pydantic-core; with
+    ``validate=False`` they are dumped as dicts by orjson. Routes keep their
+    ``response_model`` for the OpenAPI schema.
+    """
+
+    def __init__(self, schema: Type[BaseModel], validate: bool = True):
+        self.fields = list(schema.model_fields)
+        self.validate = validate
+        self.adapter = TypeAdapter(List[schema])
+
+    def columns(self, model) -> List[Any]:
+        return [getattr(model, field) for field in self.fields]
+
+    def to_dicts(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in rows]
+
+    def dump_json(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        items = self.to_dicts(rows)
+        if self.validate:
+            return self.adapter.dump_json(self.adapter.validate_python(items))
+        if orjson is not None:
+            return orjson.dumps(items)
+        return JSONResponse(items).body
+
+    def response(self, rows: Sequence[Sequence[Any]], headers: Optional[Dict[str, str]] = None) -> Response:
+        return Response(self.dump_json(rows), media_type="application/json", headers=headers)
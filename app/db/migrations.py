@@ -0,0 +1,41 @@
+# app/db/migrations.py
+import logging
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Alembic head this code expects. Kept as a constant so the startup check costs one
+# SELECT instead of loading every migration script; tests/test_startup.py keeps it in
+# step with alembic/versions.
+SCHEMA_REVISION = "b8e2f4a6c013"
+
+
+class SchemaMismatchError(RuntimeError):
+    pass
+
+
+def current_revision(bind: Engine) -> Optional[str]:
+    """Revision stamped in ``alembic_version``, or None for an unmanaged database."""
+    with bind.connect() as connection:
+        try:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        except DBAPIError:
+            return None
+
+
+def check_schema(bind: Engine, strict: bool = False) -> bool:
+    """Compare the database's Alembic revision with `SCHEMA_REVISION`.
+
+    Logs a warning on mismatch, or raises `SchemaMismatchError` when ``strict``.
+    """
+    revision = current_revision(bind)
+    if revision == SCHEMA_REVISION:
+        return True
+    message = f"Database schema is at revision {revision}, code expects {SCHEMA_REVISION}; run `alembic upgrade head`"
+    if strict:
+        raise SchemaMismatchError(message)
+    logger.warning(message)
+    return False
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date, DateTime, Index, DDL, event
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -13,7 +13,7 @@ class Subcategory(Base):
     __tablename__ = "subcategories"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
-    category_id = Column(Integer, ForeignKey("categories.id"))
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
     discounts = relationship("Discount", back_populates="subcategory")
     
     
@@ -24,24 +24,43 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.id"))
     subcategory_id = Column(Integer, ForeignKey("subcategories.id"), nullable=True)
     price = Column(Float)
+    # Price before the running promotion; NULL when the product is not on promotion
+    original_price = Column(Float, nullable=True)
     stock = Column(Integer, default=0)
     reserved_quantity = Column(Integer, default=0)
     is_available = Column(Boolean, default=True)
     sold_date = Column(Date, nullable=True)
+    # Number of stock_shards slots holding this product's stock; 0 keeps it on this row
+    shard_count = Column(Integer, nullable=False, default=0, server_default="0")
 
-    category = relationship("Category", lazy="joined")
-    subcategory = relationship("Subcategory", lazy="joined")
+    # Never loaded implicitly: queries that need names opt in with a joinedload (see products_service)
+    category = relationship("Category", lazy="raise")
+    subcategory = relationship("Subcategory", lazy="raise")
     discounts = relationship("Discount", back_populates="product")
     sales = relationship("Sale", back_populates="product")
+    reservations = relationship("Reservation", back_populates="product", passive_deletes=True)
+    stock_shards = relationship("StockShard", passive_deletes=True)
+
+    # Listing filters and keyset sorts always end on `id`; the sold report only reads unavailable rows
+    __table_args__ = (
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_subcategory_id_id", "subcategory_id", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index(
+            "ix_products_unavailable_sold_date", "sold_date", "category_id",
+            postgresql_where=is_available == False,
+            sqlite_where=is_available == False,
+        ),
+    )
 
 
 class Discount(Base):
     __tablename__ = "discounts"
     id = Column(Integer, primary_key=True, index=True)
     percentage = Column(Float, nullable=False)
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
-    subcategory_id = Column(Integer, ForeignKey("subcategories.id"), nullable=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True, index=True)
+    subcategory_id = Column(Integer, ForeignKey("subcategories.id"), nullable=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True, index=True)
 
     category = relationship("Category", back_populates="discounts")
     subcategory = relationship("Subcategory", back_populates="discounts")
@@ -51,9 +70,94 @@ class Discount(Base):
 class Sale(Base):
     __tablename__ = "sales"
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     actual_price = Column(Float, nullable=False)
     discounted_price = Column(Float, nullable=True)
-    sale_date = Column(Date, nullable=False)
+    sale_date = Column(Date, nullable=False, index=True)
+    # Set on write-behind rows so replaying a spill file cannot insert a sale twice
+    record_id = Column(String(32), nullable=True, index=True, unique=True)
+
+    product = relationship("Product", back_populates="sales")
+
+
+class SalesDaily(Base):
+    # Per day and product rollup of `sales`, kept current by every sales insert; reports read this.
+    # Category columns are the product's at the time of the sale. Sharded products roll up per
+    # stock slot so concurrent sells never share a row; reports sum over slots.
+    __tablename__ = "sales_daily"
+    sale_date = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    slot = Column(Integer, primary_key=True, default=0)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    subcategory_id = Column(Integer, ForeignKey("subcategories.id"), nullable=True)
+    units = Column(Integer, nullable=False, default=0)
+    gross_revenue = Column(Float, nullable=False, default=0)
+    net_revenue = Column(Float, nullable=False, default=0)
+
+    # Date ranges use the primary key; category/subcategory filters narrow by date within one id
+    __table_args__ = (
+        Index("ix_sales_daily_category_id_sale_date", "category_id", "sale_date"),
+        Index("ix_sales_daily_subcategory_id_sale_date", "subcategory_id", "sale_date"),
+    )
+
+
+class Reservation(Base):
+    # Units held for a buyer until `expires_at`; products.reserved_quantity is the sum of these rows
+    __tablename__ = "reservations"
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    holder = Column(String, nullable=True, index=True)
+    quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # stock_shards slot the units are held in; None for unsharded products
+    slot = Column(Integer, nullable=True)
+
+    product = relationship("Product", back_populates="reservations")
+
+
+class StockShard(Base):
+    # One counter slot of a sharded product (see app/services/stock_shards.py); the product's
+    # stock and reserved_quantity are its own row plus the sum of its slots
+    __tablename__ = "stock_shards"
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    slot = Column(Integer, primary_key=True)
+    stock = Column(Integer, nullable=False, default=0)
+    reserved_quantity = Column(Integer, nullable=False, default=0)
+
+
+# Name search structures (app/services/search_service.py) are dialect specific, so they are
+# created next to `products` here and by the 8f3b2d6a1c57 migration rather than as ORM indexes.
+PRODUCT_SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_products_name_tsv ON products "
+        "USING gin (to_tsvector('simple', coalesce(name, '')))",
+    ],
+    "sqlite": [
+        # External-content FTS5 tables: word prefixes and trigrams (substring / fuzzy)
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+        "name, content='products', content_rowid='id', prefix='2 3')",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_trgm USING fts5("
+        "name, content='products', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS products_search_ai AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); "
+        "INSERT INTO products_trgm(rowid, name) VALUES (new.id, new.name); END",
+        "CREATE TRIGGER IF NOT EXISTS products_search_ad AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO products_trgm(products_trgm, rowid, name) VALUES ('delete', old.id, old.name); END",
+        "CREATE TRIGGER IF NOT EXISTS products_search_au AFTER UPDATE OF name ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO products_trgm(products_trgm, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name); "
+        "INSERT INTO products_trgm(rowid, name) VALUES (new.id, new.name); END",
+    ],
+}
+
+for _dialect, _statements in PRODUCT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
 
-    product = relationship("Product", back_populates="sales")
\ No newline at end of file
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_trgm").execute_if(dialect="sqlite"))
@@ -0,0 +1,75 @@
+# app/db/pool.py
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from ..core.histogram import Histogram
+from ..core.metrics import format_histograms, format_metric
+from typing import Any, Dict, List
+
+
+class _InstrumentedPoolMixin:
+    """Records how long callers wait to check a connection out of the pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = Histogram()
+        self.timeouts = 0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_histogram.observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # QueuePool counts overflow from -size; only connections beyond `size` are reported here
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, _InstrumentedPoolMixin):
+        stats.update(timeouts=pool.timeouts, checkout_wait_seconds=pool.wait_histogram.snapshot())
+    return stats
+
+
+def pool_metric_lines(pools: Dict[str, Any]) -> List[str]:
+    """Prometheus lines for the pools of each named engine."""
+    queue_pools = {name: pool for name, pool in pools.items() if isinstance(pool, QueuePool)}
+    lines: List[str] = []
+    for metric, help_text, read in (
+        ("db_pool_checked_out", "Connections currently checked out.", lambda pool: pool.checkedout()),
+        ("db_pool_checked_in", "Idle connections in the pool.", lambda pool: pool.checkedin()),
+        ("db_pool_overflow", "Connections open beyond pool_size.", lambda pool: max(pool.overflow(), 0)),
+    ):
+        lines += format_metric(
+            metric, "gauge", help_text, [((("engine", name),), read(pool)) for name, pool in queue_pools.items()]
+        )
+    instrumented = {name: pool for name, pool in pools.items() if isinstance(pool, _InstrumentedPoolMixin)}
+    lines += format_metric(
+        "db_pool_timeouts_total", "counter", "Checkouts that gave up waiting for a connection.",
+        [((("engine", name),), pool.timeouts) for name, pool in instrumented.items()]
+    )
+    lines += format_histograms(
+        "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+        {(("engine", name),): pool.wait_histogram for name, pool in instrumented.items()}
+    )
+    return lines
@@ -1,9 +1,56 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .api import products, categories
-from .db.database import init_db
+from fastapi.concurrency import run_in_threadpool
+from .api import products, categories, sales, monitoring
+from .db import database
+from .db.migrations import check_schema
+from .services.reservation_service import run_sweeper
+from .services.sales_writer import sales_writer
+from .services.pagination import NEXT_CURSOR_HEADER
+from .core.config import settings
+from .core.metrics import MetricsMiddleware, install_sql_metrics
+from .core.read_your_writes import ReadYourWritesMiddleware
+from .core.profiling import (
+    QUERY_COUNT_HEADER, QUERY_TIME_HEADER, REPEATED_QUERIES_HEADER, QueryProfilerMiddleware
+)
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database at import time; schema work is opt-in and happens here
+    if settings.DB_CREATE_TABLES:
+        await run_in_threadpool(database.init_db)
+    if settings.DB_SCHEMA_CHECK != "off":
+        await run_in_threadpool(check_schema, database.engine, settings.DB_SCHEMA_CHECK == "strict")
+    if sales_writer.enabled:
+        await run_in_threadpool(sales_writer.start)
+    sweeper = None
+    if settings.RESERVATION_SWEEP_INTERVAL > 0:
+        sweeper = asyncio.create_task(run_sweeper(settings.RESERVATION_SWEEP_INTERVAL))
+    yield
+    if sweeper is not None:
+        sweeper.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await sweeper
+    if sales_writer.enabled:
+        await run_in_threadpool(sales_writer.close)
+    await database.dispose_engines()
+
+
+app = FastAPI(lifespan=lifespan)
+
+if settings.METRICS_ENABLED:
+    install_sql_metrics()
+    app.add_middleware(MetricsMiddleware)
+
+if settings.QUERY_PROFILING:
+    app.add_middleware(QueryProfilerMiddleware, repeat_threshold=settings.QUERY_PROFILING_REPEAT_THRESHOLD)
+
+if database.ReplicaSessionLocals and settings.READ_YOUR_WRITES_WINDOW > 0:
+    app.add_middleware(ReadYourWritesMiddleware, window=settings.READ_YOUR_WRITES_WINDOW)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,11 +58,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER, REPEATED_QUERIES_HEADER],
 )
 
-init_db()
 app.include_router(products.router, prefix="/products", tags=["products"])
 app.include_router(categories.router, prefix="/categories", tags=["categories"])
-
-for route in app.routes:
-    print(route.path, route.name)
\ No newline at end of file
+app.include_router(sales.router, prefix="/sales", tags=["sales"])
+app.include_router(monitoring.router, tags=["monitoring"])
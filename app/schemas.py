@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Optional, List
+from datetime import date
 
 class ProductBase(BaseModel):
     id: Optional[int] = None
@@ -17,6 +18,24 @@ class ProductCreate(ProductBase):
     is_available: None = None
 
 
+class ProductImportRow(ProductCreate):
+    # Exported rows carry these; they are ignored so an export can be re-imported
+    id: Optional[int] = None
+    is_available: Optional[bool] = None
+    # Either the id or the name of the category/subcategory may be given
+    category_id: Optional[int] = None
+    category: Optional[str] = None
+    subcategory_id: Optional[int] = None
+    subcategory: Optional[str] = None
+
+
+class ProductImportReport(BaseModel):
+    inserted: int
+    updated: int
+    failed: int
+    batches: List[dict]
+
+
 class ProductUpdateStock(BaseModel):
     new_stock: int = Field(..., ge=0)
 
@@ -29,11 +48,39 @@ class ProductSell(BaseModel):
     pass
 
 
+class CartItem(BaseModel):
+    product_id: int
+    quantity: int = Field(1, gt=0)
+
+
+class CartRequest(BaseModel):
+    items: List[CartItem] = Field(..., min_length=1)
+    # Who the reservation is held for (customer or session id); sells consume the holder's units first
+    holder: Optional[str] = Field(None, max_length=100)
+
+
 class ProductResponse(ProductBase):
-    pass
+    original_price: Optional[float] = None
+
+
+class PromotionRequest(BaseModel):
+    discount: float = Field(..., ge=0, lt=100)
+    category_id: Optional[int] = None
+    subcategory_id: Optional[int] = None
 
-    class Config:
-        orm_mode = True
+
+class PromotionReport(BaseModel):
+    updated: int
+
+
+class SalesReportRow(BaseModel):
+    day: Optional[date] = None
+    category_id: Optional[int] = None
+    subcategory_id: Optional[int] = None
+    product_id: Optional[int] = None
+    units: int
+    gross_revenue: float
+    net_revenue: float
 
 
 class CategoryCreate(BaseModel):
@@ -44,5 +91,18 @@ class CategoryResponse(BaseModel):
     id: int
     name: str
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SubcategoryTreeNode(BaseModel):
+    id: int
+    name: str
+    available_products: int
+
+
+class CategoryTreeNode(BaseModel):
+    id: int
+    name: str
+    # Includes products without a subcategory, so it can exceed the sum of the children
+    available_products: int
+    subcategories: List[SubcategoryTreeNode]
@@ -0,0 +1,42 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from ..db import models
+from ..db.database import is_replica
+from .category_tree import category_tree
+from .pagination import keyset_page
+from typing import Any, Dict, List, Optional, Tuple
+
+def create_category(db: Session, name: str) -> models.Category:
+    db_category = db.query(models.Category).filter(models.Category.name == name).first()
+    if db_category:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category already exists")
+    new_category = models.Category(name=name)
+    db.add(new_category)
+    db.commit()
+    db.refresh(new_category)
+    return new_category
+
+CATEGORY_SORT_COLUMNS = {
+    "id": models.Category.id,
+    "name": models.Category.name,
+}
+
+def get_category_page(
+    db: Session,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    skip: int = 0
+) -> Tuple[List[models.Category], Optional[str]]:
+    query = db.query(models.Category)
+    return keyset_page(query, sort, CATEGORY_SORT_COLUMNS[sort], models.Category.id, limit, cursor=cursor, skip=skip)
+
+def get_category_list(db: Session, skip: int = 0, limit: int = 10) -> List[models.Category]:
+    categories, _ = get_category_page(db, limit=limit, skip=skip)
+    return categories
+
+def get_category_tree(db: Session, cached: bool = True) -> List[Dict[str, Any]]:
+    # Trees built on a lagging replica are served but not kept; cached=False rebuilds from ``db``
+    if not cached:
+        return category_tree.load(db, keep=not is_replica(db))
+    return category_tree.get(db, keep=not is_replica(db))
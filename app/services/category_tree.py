@@ -0,0 +1,85 @@
+from sqlalchemy import event, func, inspect, literal, select, union_all
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..db import models
+from .snapshot_cache import SnapshotCache
+from typing import Any, Dict, List
+
+# Product columns the tree's available-product counts depend on
+TREE_PRODUCT_COLUMNS = {"is_available", "category_id", "subcategory_id"}
+
+
+def build_category_tree(db: Session) -> List[Dict[str, Any]]:
+    category = models.Category
+    subcategory = models.Subcategory
+    product = models.Product
+    # Available products per (category, subcategory), plus every subcategory with a zero count so
+    # empty ones still appear; both halves travel in one UNION ALL round trip
+    counted = (
+        select(category.id, category.name, subcategory.id, subcategory.name, func.count(product.id))
+        .select_from(category)
+        .outerjoin(product, (product.category_id == category.id) & (product.is_available == True))
+        .outerjoin(subcategory, subcategory.id == product.subcategory_id)
+        .group_by(category.id, category.name, subcategory.id, subcategory.name)
+    )
+    empty = (
+        select(category.id, category.name, subcategory.id, subcategory.name, literal(0))
+        .join(subcategory, subcategory.category_id == category.id)
+    )
+
+    nodes: Dict[int, Dict[str, Any]] = {}
+    children: Dict[int, Dict[int, Dict[str, Any]]] = {}
+    for category_id, category_name, subcategory_id, subcategory_name, count in db.execute(union_all(counted, empty)):
+        node = nodes.get(category_id)
+        if node is None:
+            node = nodes[category_id] = {"id": category_id, "name": category_name, "available_products": 0, "subcategories": []}
+            children[category_id] = {}
+        node["available_products"] += count
+        if subcategory_id is None:
+            continue
+        child = children[category_id].get(subcategory_id)
+        if child is None:
+            child = children[category_id][subcategory_id] = {"id": subcategory_id, "name": subcategory_name, "available_products": 0}
+        child["available_products"] += count
+
+    tree = []
+    for category_id in sorted(nodes, key=lambda key: (nodes[key]["name"], key)):
+        node = nodes[category_id]
+        node["subcategories"] = sorted(children[category_id].values(), key=lambda child: (child["name"], child["id"]))
+        tree.append(node)
+    return tree
+
+
+# Category -> subcategory tree with available-product counts, kept until a committed write that can
+# change it: categories, subcategories, product inserts/deletes, availability or category moves
+category_tree: SnapshotCache[List[Dict[str, Any]]] = SnapshotCache(build_category_tree, ttl=settings.CATEGORY_TREE_TTL)
+
+
+def _changes_tree(obj) -> bool:
+    # Updated rows only matter when availability or the category/subcategory changed
+    if isinstance(obj, models.Product):
+        state = inspect(obj)
+        return any(state.attrs[key].history.has_changes() for key in TREE_PRODUCT_COLUMNS)
+    return isinstance(obj, (models.Category, models.Subcategory))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_tree_changes(session, flush_context):
+    if any(
+        isinstance(obj, (models.Category, models.Subcategory, models.Product))
+        for obj in (*session.new, *session.deleted)
+    ) or any(_changes_tree(obj) for obj in session.dirty):
+        category_tree.mark_changed(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_tree_changes(orm_execute_state):
+    # Covers ORM and Core DML alike. Bulk UPDATEs of products mostly move stock and prices, so the
+    # services whose UPDATEs set TREE_PRODUCT_COLUMNS (sell-outs, the import merge) mark the tree themselves
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    table = orm_execute_state.statement.entity_description["table"]
+    if table in (models.Category.__table__, models.Subcategory.__table__) or (
+        table is models.Product.__table__ and not orm_execute_state.is_update
+    ):
+        category_tree.mark_changed(orm_execute_state.session)
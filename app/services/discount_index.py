@@ -0,0 +1,76 @@
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..db import models
+from .snapshot_cache import SnapshotCache
+from typing import Dict, Optional, Tuple
+
+# Highest percentage by product id, category id and subcategory id
+Snapshot = Tuple[Dict[int, float], Dict[int, float], Dict[int, float]]
+
+
+def load_discounts(db: Session) -> Snapshot:
+    by_product: Dict[int, float] = {}
+    by_category: Dict[int, float] = {}
+    by_subcategory: Dict[int, float] = {}
+    rows = db.execute(
+        select(
+            models.Discount.product_id,
+            models.Discount.category_id,
+            models.Discount.subcategory_id,
+            func.max(models.Discount.percentage),
+        ).group_by(
+            models.Discount.product_id,
+            models.Discount.category_id,
+            models.Discount.subcategory_id,
+        )
+    )
+    for product_id, category_id, subcategory_id, percentage in rows:
+        for key, target in ((product_id, by_product), (category_id, by_category), (subcategory_id, by_subcategory)):
+            if key is not None and percentage > target.get(key, 0.0):
+                target[key] = percentage
+    return by_product, by_category, by_subcategory
+
+
+class DiscountIndex(SnapshotCache[Snapshot]):
+    """In-process lookup of the highest discount per product, category and subcategory.
+
+    The whole `discounts` table is folded into three dicts on first use, so resolving
+    the effective discount of a sale is a constant-time lookup instead of a query.
+    Any committed change to a `Discount` row invalidates the index.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        super().__init__(load_discounts, ttl)
+
+    def get_percentage(
+        self,
+        db: Session,
+        product_id: int,
+        category_id: Optional[int] = None,
+        subcategory_id: Optional[int] = None,
+    ) -> float:
+        # A load dropped by a racing invalidation still returns what it read, so the sale is priced from it
+        by_product, by_category, by_subcategory = self.get(db)
+        return max(
+            by_product.get(product_id, 0.0),
+            by_category.get(category_id, 0.0),
+            by_subcategory.get(subcategory_id, 0.0),
+        )
+
+
+discount_index = DiscountIndex(ttl=settings.DISCOUNT_INDEX_TTL)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_discount_changes(session, flush_context):
+    if any(isinstance(obj, models.Discount) for obj in (*session.new, *session.dirty, *session.deleted)):
+        discount_index.mark_changed(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_discount_changes(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert) and any(
+        mapper.class_ is models.Discount for mapper in orm_execute_state.all_mappers
+    ):
+        discount_index.mark_changed(orm_execute_state.session)
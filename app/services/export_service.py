@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from sqlalchemy import select, Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from fastapi.responses import StreamingResponse
+from ..db import database, models
+from .products_service import filter_products, filter_sold_products
+from .stock_shards import total_columns
+from datetime import date
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence, Union
+
+EXPORT_BATCH_SIZE = 1000
+
+# Every product column, with sharded stock reported as totals and the shard flag left out
+PRODUCT_EXPORT_COLUMNS = total_columns([column for column in models.Product.__table__.columns if column.key != "shard_count"])
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def product_export_query(category_id: Optional[int] = None, subcategory_id: Optional[int] = None) -> Select:
+    query = select(*PRODUCT_EXPORT_COLUMNS)
+    return filter_products(query, category_id=category_id, subcategory_id=subcategory_id).order_by(models.Product.id)
+
+def sold_product_export_query(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None
+) -> Select:
+    query = select(*PRODUCT_EXPORT_COLUMNS)
+    return filter_sold_products(
+        query, start_date=start_date, end_date=end_date, category_id=category_id
+    ).order_by(models.Product.id)
+
+def sale_export_query(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None
+) -> Select:
+    query = select(
+        models.Sale.id,
+        models.Sale.product_id,
+        models.Product.category_id,
+        models.Product.subcategory_id,
+        models.Sale.actual_price,
+        models.Sale.discounted_price,
+        models.Sale.sale_date,
+    ).join(models.Product, models.Product.id == models.Sale.product_id)
+
+    if start_date:
+        query = query.where(models.Sale.sale_date >= start_date)
+    if end_date:
+        query = query.where(models.Sale.sale_date <= end_date)
+    query = filter_products(query, category_id=category_id, subcategory_id=subcategory_id)
+    return query.order_by(models.Sale.id)
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _encode_ndjson(columns: List[str], rows: Sequence[Sequence[Any]]) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+def _encode_csv(columns: List[str], rows: Sequence[Sequence[Any]]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+def _iter_batches_sync(
+    query: Select, encode: Callable, columns: List[str], header: str, session_factory: sessionmaker
+) -> Iterator[str]:
+    # Starlette drives sync iterators from the threadpool, one batch per step
+    if header:
+        yield header
+    with session_factory() as db:
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            yield encode(columns, batch)
+
+async def _iter_batches_async(
+    query: Select, encode: Callable, columns: List[str], header: str, session_factory: async_sessionmaker
+) -> AsyncIterator[str]:
+    if header:
+        yield header
+    async with session_factory() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for batch in result.partitions():
+            yield encode(columns, batch)
+
+def stream_export(
+    query: Select, export_format: str, session_factory: Optional[Union[sessionmaker, async_sessionmaker]] = None
+) -> Union[Iterator[str], AsyncIterator[str]]:
+    """Encode the rows of ``query`` batch by batch as NDJSON or CSV.
+
+    Rows are pulled through a server-side cursor (``yield_per``) on a session owned
+    by the stream itself, so memory stays bounded by one batch however many rows
+    the export covers. ``session_factory`` picks the database (a replica, see
+    ``database.read_sessionmaker``); the primary by default.
+    """
+    columns = list(query.selected_columns.keys())
+    if export_format == "csv":
+        encode, header = _encode_csv, _encode_csv(columns, [columns])
+    else:
+        encode, header = _encode_ndjson, ""
+    if session_factory is None:
+        session_factory = database.AsyncSessionLocal if database.AsyncSessionLocal is not None else database.SessionLocal
+    if isinstance(session_factory, async_sessionmaker):
+        return _iter_batches_async(query, encode, columns, header, session_factory)
+    return _iter_batches_sync(query, encode, columns, header, session_factory)
+
+def export_response(
+    query: Select,
+    export_format: str,
+    filename: str,
+    session_factory: Optional[Union[sessionmaker, async_sessionmaker]] = None,
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(query, export_format, session_factory),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
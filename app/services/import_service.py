@@ -0,0 +1,248 @@
+import csv
+import io
+import json
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, case, exists, insert, literal, select, update
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from ..db import database, models
+from ..schemas import ProductImportRow
+from .category_tree import category_tree
+from .product_cache import product_cache
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+IMPORT_BATCH_SIZE = 5000
+
+# Per-connection scratch table: each batch is loaded here first, then merged into
+# `products` with one UPDATE ... FROM and one INSERT ... SELECT
+products_import = Table(
+    "products_import",
+    MetaData(),
+    Column("name", String),
+    Column("category_id", Integer),
+    Column("subcategory_id", Integer),
+    Column("price", Float),
+    Column("stock", Integer),
+    prefixes=["TEMPORARY"],
+)
+STAGING_COLUMNS = [column.name for column in products_import.columns]
+
+Record = Tuple[int, Any]
+
+def _blank_to_none(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: (None if value == "" else value) for key, value in row.items()}
+
+def iter_records(lines: Iterable[str], import_format: str) -> Iterator[Record]:
+    """Yield ``(line number, dict)`` per input record, or ``(line number, error)`` when it cannot be parsed."""
+    if import_format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, _blank_to_none(row)
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, record
+
+def _resolve_names(db: Session, model, names: Iterable[str]) -> Dict[str, Tuple[int, Optional[int]]]:
+    names = set(names)
+    if not names:
+        return {}
+    parent = getattr(model, "category_id", None)
+    columns = [model.name, model.id, parent] if parent is not None else [model.name, model.id]
+    rows = db.execute(select(*columns).where(model.name.in_(names)))
+    return {row[0]: (row[1], row[2] if parent is not None else None) for row in rows}
+
+def _validate_batch(db: Session, records: List[Record]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    errors = []
+    parsed: List[Tuple[int, ProductImportRow]] = []
+    for line_number, record in records:
+        if isinstance(record, str):
+            errors.append({"line": line_number, "error": record})
+            continue
+        try:
+            parsed.append((line_number, ProductImportRow.model_validate(record)))
+        except ValidationError as exc:
+            errors.append({"line": line_number, "error": "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+            )})
+
+    # One lookup per batch instead of one per row
+    categories = _resolve_names(db, models.Category, (row.category for _, row in parsed if row.category))
+    subcategories = _resolve_names(db, models.Subcategory, (row.subcategory for _, row in parsed if row.subcategory))
+
+    # Rows are keyed on (name, category_id); a later row for the same product wins
+    valid: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for line_number, row in parsed:
+        category_id = row.category_id
+        if row.category:
+            if row.category not in categories:
+                errors.append({"line": line_number, "error": f"Unknown category '{row.category}'"})
+                continue
+            category_id = categories[row.category][0]
+        if category_id is None:
+            errors.append({"line": line_number, "error": "category_id or category is required"})
+            continue
+        subcategory_id = row.subcategory_id
+        if row.subcategory:
+            if row.subcategory not in subcategories:
+                errors.append({"line": line_number, "error": f"Unknown subcategory '{row.subcategory}'"})
+                continue
+            subcategory_id, parent_id = subcategories[row.subcategory]
+            if parent_id != category_id:
+                errors.append({"line": line_number, "error": f"Subcategory '{row.subcategory}' is not in category {category_id}"})
+                continue
+        valid[(row.name, category_id)] = {
+            "line": line_number,
+            "name": row.name,
+            "category_id": category_id,
+            "subcategory_id": subcategory_id,
+            "price": row.price,
+            "stock": row.stock,
+        }
+    return list(valid.values()), errors
+
+def _copy_into_staging(db: Session, rows: List[Dict[str, Any]]) -> None:
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([row[column] for column in STAGING_COLUMNS] for row in rows)
+        buffer.seek(0)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY products_import ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        db.execute(insert(products_import), [{column: row[column] for column in STAGING_COLUMNS} for row in rows])
+
+def _merge_staging(db: Session) -> Tuple[int, int, Dict[Tuple[str, int], str]]:
+    """Upsert the staged rows; returns (inserted, updated, why each existing product was left unchanged)."""
+    products = models.Product.__table__
+    staged = products_import.c
+    same_product = (products.c.name == staged.name) & (products.c.category_id == staged.category_id)
+
+    # Nothing makes (name, category_id) unique, so a key can match several products
+    matched: Dict[Tuple[str, int], List[Tuple[int, int]]] = {}
+    for name, category_id, product_id, shard_count in db.execute(
+        select(staged.name, staged.category_id, products.c.id, products.c.shard_count).where(same_product)
+    ):
+        matched.setdefault((name, category_id), []).append((product_id, shard_count))
+    duplicate_ids = [product_id for matches in matched.values() if len(matches) > 1 for product_id, _ in matches]
+    updated = set(db.execute(
+        update(products)
+        .where(
+            same_product,
+            # Stock may not drop below the units already reserved, which would break later sells and cancels
+            staged.stock >= products.c.reserved_quantity,
+            # Sharded stock lives in stock_shards; writing the row would add to the slot totals
+            products.c.shard_count == 0,
+            # Updating every duplicate would overwrite them all with one row
+            products.c.id.not_in(duplicate_ids),
+        )
+        .values(
+            # A feed price replaces any promotional one, ending the product's promotion
+            price=staged.price,
+            original_price=None,
+            stock=staged.stock,
+            subcategory_id=staged.subcategory_id,
+            is_available=staged.stock > 0,
+            sold_date=case((staged.stock > 0, None), else_=products.c.sold_date),
+        )
+        .returning(products.c.name, products.c.category_id)
+    ).all())
+    if updated:
+        # Availability and subcategory may have moved
+        category_tree.mark_changed(db)
+    inserted = db.execute(
+        insert(products).from_select(
+            STAGING_COLUMNS + ["reserved_quantity", "is_available"],
+            select(*[staged[column] for column in STAGING_COLUMNS], literal(0), staged.stock > 0).where(
+                ~exists().where(same_product)
+            ),
+        )
+    ).rowcount
+    rejected = {}
+    for key, matches in matched.items():
+        if key in updated:
+            continue
+        if len(matches) > 1:
+            rejected[key] = f"{len(matches)} products have this name in this category; remove the duplicates before importing it"
+        elif matches[0][1]:
+            rejected[key] = "Stock is sharded; set stock-shards to 0 before importing it"
+        else:
+            rejected[key] = "Stock is below the product's reserved quantity"
+    return inserted, len(updated), rejected
+
+def import_batch(db: Session, records: List[Record]) -> Dict[str, Any]:
+    rows, errors = _validate_batch(db, records)
+    report = {"inserted": 0, "updated": 0, "failed": len(errors), "errors": errors}
+    if not rows:
+        db.rollback()
+        return report
+    try:
+        db.execute(CreateTable(products_import, if_not_exists=True))
+        db.execute(products_import.delete())
+        _copy_into_staging(db, rows)
+        report["inserted"], report["updated"], rejected = _merge_staging(db)
+        db.execute(products_import.delete())
+        db.commit()
+        lines = {(row["name"], row["category_id"]): row["line"] for row in rows}
+        for key in sorted(rejected, key=lines.get):
+            report["errors"].append({"line": lines[key], "error": rejected[key]})
+        report["failed"] += len(rejected)
+        # Set-based merge does not tell which ids changed
+        if report["updated"]:
+            product_cache.clear()
+    except Exception as exc:
+        db.rollback()
+        report["failed"] += len(rows)
+        report["errors"].append({"line": None, "error": f"Batch failed: {exc.__class__.__name__}: {exc}"})
+    return report
+
+def import_products(
+    db: Session,
+    lines: Iterable[str],
+    import_format: str = "ndjson",
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """Validate and upsert a product feed batch by batch; each batch commits on its own.
+
+    Returns totals plus a per-batch report listing the rejected lines.
+    """
+    summary = {"inserted": 0, "updated": 0, "failed": 0, "batches": []}
+
+    def flush(batch: List[Record]) -> None:
+        report = import_batch(db, batch)
+        report["batch"] = len(summary["batches"]) + 1
+        report["rows"] = len(batch)
+        summary["inserted"] += report["inserted"]
+        summary["updated"] += report["updated"]
+        summary["failed"] += report["failed"]
+        summary["batches"].append(report)
+
+    batch: List[Record] = []
+    for record in iter_records(lines, import_format):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return summary
+
+def import_feed(feed: BinaryIO, import_format: str = "ndjson", batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """Import a binary UTF-8 feed on a session of its own, for the upload endpoint and the CLI."""
+    lines = io.TextIOWrapper(feed, encoding="utf-8", newline="")
+    with database.SessionLocal() as db:
+        return import_products(db, lines, import_format, batch_size)
@@ -0,0 +1,61 @@
+import base64
+import binascii
+import json
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from fastapi import HTTPException, status
+from typing import Any, List, Optional, Tuple
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    raw = json.dumps([sort, value, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if cursor_sort != sort or not isinstance(last_id, int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match the requested sort")
+    return value, last_id
+
+def keyset_page(
+    query: Query,
+    sort: str,
+    sort_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one page ordered by ``(sort_column, id_column)``.
+
+    With a cursor the page starts right after the row it encodes, which the
+    ``(sort key, id)`` index answers without walking the skipped rows. Without one
+    the legacy ``skip`` offset is honoured. Returns the rows and the cursor of the
+    next page, or ``None`` on the last page.
+    """
+    if sort_column is id_column:
+        order_by = [id_column]
+    else:
+        order_by = [sort_column, id_column]
+    query = query.order_by(*order_by)
+
+    if cursor is not None:
+        value, last_id = decode_cursor(cursor, sort)
+        if sort_column is id_column:
+            query = query.filter(id_column > last_id)
+        else:
+            query = query.filter(tuple_(sort_column, id_column) > tuple_(value, last_id))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, getattr(last, sort_column.key), getattr(last, id_column.key))
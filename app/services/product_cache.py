@@ -0,0 +1,220 @@
+import fnmatch
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from ..core.config import settings
+from ..core.metrics import format_metric, metrics
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+
+class CacheBackend(ABC):
+    """Storage behind `ProductCache`; values are plain dicts."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    def __len__(self) -> int:
+        # Shared stores cannot count their entries cheaply; they report 0
+        return 0
+
+
+class LRUCacheBackend(CacheBackend):
+    """Thread-safe in-process LRU bounded by entry count, with a per-entry TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class KeyValueCacheBackend(CacheBackend):
+    """Shared backend over a redis-py style client (`get`, `set(..., ex=)`, `delete`, `scan_iter`).
+
+    Lets several worker processes share one product cache; values are stored as JSON.
+    """
+
+    def __init__(self, client, ttl: float, prefix: str = "product:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class InMemoryKeyValueStore:
+    """Local stand-in for a shared key-value server, speaking the subset of the redis-py API used above."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[Optional[float], str]] = {}
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name: str, value: str, ex: Optional[int] = None) -> None:
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match: str = "*") -> Iterator[str]:
+        with self._lock:
+            names = list(self._data)
+        return (name for name in names if fnmatch.fnmatchcase(name, match))
+
+
+class ProductCache:
+    """Read-through cache of serialized products with hit/miss counters.
+
+    Writers call `invalidate` after committing. Loads remember the invalidation
+    generation they started in and are not stored if a write committed meanwhile,
+    so a slow reader can never put a pre-write row back into the cache.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend]):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, product_id: int) -> Optional[Dict[str, Any]]:
+        if self.backend is None:
+            return None
+        value = self.backend.get(str(product_id))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def load(self, product_id: int, loader: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        generation = self._generation
+        value = loader()
+        if self.backend is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self.backend.set(str(product_id), value)
+        return value
+
+    def invalidate(self, *product_ids: int) -> None:
+        if self.backend is None:
+            return
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for product_id in product_ids:
+                self.backend.delete(str(product_id))
+
+    def clear(self) -> None:
+        if self.backend is None:
+            return
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "size": len(self.backend) if self.backend is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def _build_backend() -> Optional[CacheBackend]:
+    if settings.PRODUCT_CACHE_BACKEND == "memory":
+        return LRUCacheBackend(settings.PRODUCT_CACHE_SIZE, settings.PRODUCT_CACHE_TTL)
+    if settings.PRODUCT_CACHE_BACKEND == "shared-local":
+        return KeyValueCacheBackend(InMemoryKeyValueStore(), settings.PRODUCT_CACHE_TTL)
+    return None
+
+
+product_cache = ProductCache(_build_backend())
+
+
+def _product_cache_metric_lines():
+    return (
+        format_metric("product_cache_hits_total", "counter", "Product reads served from cache.", [((), product_cache.hits)])
+        + format_metric("product_cache_misses_total", "counter", "Product reads that went to the database.", [((), product_cache.misses)])
+        + format_metric("product_cache_invalidations_total", "counter", "Product cache invalidations.", [((), product_cache.invalidations)])
+    )
+
+
+metrics.add_collector(_product_cache_metric_lines)
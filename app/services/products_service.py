@@ -1,8 +1,79 @@
-from sqlalchemy.orm import Session
+import random
+from sqlalchemy import update, case, select, insert, delete, func, cast, Numeric
+from sqlalchemy.orm import Session, joinedload, load_only, undefer
 from fastapi import HTTPException, status
+from ..core.config import settings
 from ..db import models
-from datetime import date
-from typing import Optional, List
+from ..db.database import is_replica
+from .category_tree import category_tree
+from .discount_index import discount_index
+from .pagination import keyset_page
+from .product_cache import product_cache
+from .sales_writer import record_sales
+from . import stock_shards
+from ..schemas import ProductResponse
+from datetime import date, datetime, timedelta
+from typing import Any, Optional, List, Dict, Tuple
+
+# Loading strategy for Product entities: only the columns ProductResponse serializes, with any
+# other column raising instead of lazy loading. Relationships are lazy="raise" on the model;
+# a caller whose response needs the category/subcategory names adds PRODUCT_NAMES_LOAD.
+PRODUCT_FIELDS = [getattr(models.Product, name) for name in ProductResponse.model_fields]
+PRODUCT_RESPONSE_LOAD = load_only(*PRODUCT_FIELDS, models.Product.shard_count, raiseload=True)
+# Selling also needs what the discount lookup and the sales rollup read
+PRODUCT_SALE_LOAD = load_only(*PRODUCT_FIELDS, models.Product.shard_count, models.Product.subcategory_id, raiseload=True)
+PRODUCT_NAMES_LOAD = (
+    joinedload(models.Product.category).load_only(models.Category.name, raiseload=True),
+    joinedload(models.Product.subcategory).load_only(models.Subcategory.name, raiseload=True),
+)
+
+def filter_products(query, category_id: Optional[int] = None, subcategory_id: Optional[int] = None):
+    # Shared by the paged listing and the streaming export; works on Query and select()
+    if category_id is not None:
+        query = query.filter(models.Product.category_id == category_id)
+    if subcategory_id is not None:
+        query = query.filter(models.Product.subcategory_id == subcategory_id)
+    return query
+
+def filter_sold_products(
+    query,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None
+):
+    query = query.filter(models.Product.is_available == False)
+
+    if start_date:
+        query = query.filter(models.Product.sold_date >= start_date)
+    if end_date:
+        query = query.filter(models.Product.sold_date <= end_date)
+    if category_id:
+        query = query.filter(models.Product.category_id == category_id)
+    return query
+
+PRODUCT_SORT_COLUMNS = {
+    "id": models.Product.id,
+    "name": models.Product.name,
+    "price": models.Product.price,
+}
+
+def get_product_page(
+    db: Session,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    skip: int = 0,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None,
+    columns: Optional[List] = None
+) -> Tuple[List[models.Product], Optional[str]]:
+    # With ``columns`` (which must include the sort column) plain rows are returned instead of products
+    query = db.query(*columns) if columns else db.query(models.Product).options(PRODUCT_RESPONSE_LOAD)
+    query = filter_products(query, category_id=category_id, subcategory_id=subcategory_id)
+    items, next_cursor = keyset_page(query, sort, PRODUCT_SORT_COLUMNS[sort], models.Product.id, limit, cursor=cursor, skip=skip)
+    if not columns:
+        stock_shards.apply_totals(db, items)
+    return items, next_cursor
 
 def get_product_list(
     db: Session,
@@ -12,21 +83,29 @@ def get_product_list(
     subcategory_id: Optional[int] = None
     
 ) -> List[models.Product]:
-    query = db.query(models.Product)
-
-    if category_id is not None:
-        query = query.filter(models.Product.category_id == category_id)
-    if subcategory_id is not None:
-        query = query.filter(models.Product.subcategory_id == subcategory_id)
+    products, _ = get_product_page(db, limit=limit, skip=skip, category_id=category_id, subcategory_id=subcategory_id)
+    return products
 
-    return query.offset(skip).limit(limit).all()
-
-def get_product_or_404(db: Session, product_id: int) -> models.Product:
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+def get_product_or_404(db: Session, product_id: int, *options) -> models.Product:
+    # ``options`` replace the default PRODUCT_RESPONSE_LOAD, e.g. (PRODUCT_RESPONSE_LOAD, *PRODUCT_NAMES_LOAD)
+    product = db.query(models.Product).options(*(options or (PRODUCT_RESPONSE_LOAD,))).filter(
+        models.Product.id == product_id
+    ).populate_existing().first()
     if product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    stock_shards.apply_totals(db, [product])
     return product
 
+def get_product_data(db: Session, product_id: int) -> dict:
+    # Cache miss path of GET /products/{id}; the route checks product_cache first
+    def load() -> dict:
+        return ProductResponse.model_validate(get_product_or_404(db, product_id)).model_dump()
+
+    # A lagging replica may still return the row a committed write just invalidated; never cache it
+    if is_replica(db):
+        return load()
+    return product_cache.load(product_id, load)
+
 def create_product(db: Session, product_data: dict) -> models.Product:
     product = models.Product(**product_data)
     db.add(product)
@@ -36,96 +115,431 @@ def create_product(db: Session, product_data: dict) -> models.Product:
 
 def update_product_price(db: Session, product_id: int, new_price: float) -> Optional[models.Product]:
     product = get_product_or_404(db, product_id)
+    # An explicit price replaces the promotional one and ends the product's promotion
     product.price = new_price
+    product.original_price = None
     db.commit()
+    product_cache.invalidate(product_id)
     db.refresh(product)
+    stock_shards.apply_totals(db, [product])
     return product
 
-def reserve_product(db: Session, product_id: int) -> models.Product:
-    product = get_product_or_404(db, product_id)
-    if product.stock - product.reserved_quantity <= 0:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product is out of stock")
-    product.reserved_quantity += 1
+def remove_product(db: Session, product_id: int) -> models.Product:
+    # The unit of work reads every foreign key of a deleted row, so load all columns
+    product = get_product_or_404(db, product_id, undefer("*"))
+    db.delete(product)
     db.commit()
-    db.refresh(product)
+    product_cache.invalidate(product_id)
     return product
 
-def cancel_reservation(db: Session, product_id: int) -> models.Product:
-    product = get_product_or_404(db, product_id)
-    if product.reserved_quantity > 0:
-        product.reserved_quantity -= 1
-    db.commit()
-    db.refresh(product)
+def _update_product_returning(db: Session, product_id: int, *criteria, **values) -> Optional[models.Product]:
+    # Guarded single-statement UPDATE: the row is only touched when `criteria` still hold,
+    # so concurrent buyers cannot both pass the check against a stale read.
+    stmt = (
+        update(models.Product)
+        .where(models.Product.id == product_id, *criteria)
+        .values(**values)
+        .returning(models.Product)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+def _reserve_units(db: Session, product_id: int, quantity: int) -> Optional[models.Product]:
+    # Sharded products keep their free units in stock_shards slots, never on the row
+    return _update_product_returning(
+        db, product_id,
+        models.Product.shard_count == 0,
+        models.Product.stock - models.Product.reserved_quantity >= quantity,
+        reserved_quantity=models.Product.reserved_quantity + quantity,
+    )
+
+def _reserve(db: Session, product_id: int, quantity: int) -> Optional[Tuple[models.Product, List[Tuple[Optional[int], int]]]]:
+    """Reserve on the product row, or on its slots when it is sharded.
+
+    Returns the product and the (slot, units) now held, slot None meaning the row itself.
+    """
+    product = _reserve_units(db, product_id, quantity)
+    if product is not None:
+        return product, [(None, quantity)]
+    product = db.query(models.Product).options(PRODUCT_RESPONSE_LOAD).filter(
+        models.Product.id == product_id, models.Product.shard_count > 0
+    ).populate_existing().first()
+    if product is None:
+        return None
+    taken = stock_shards.reserve(db, product_id, product.shard_count, quantity)
+    if taken is None:
+        return None
+    stock_shards.apply_totals(db, [product])
+    return product, taken
+
+def _hold(db: Session, holds: List[Tuple[int, int, Optional[int]]], holder: Optional[str]) -> None:
+    # One multi-row INSERT for the whole cart; each hold is (product_id, quantity, slot)
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=settings.RESERVATION_TTL)
+    db.execute(insert(models.Reservation), [
+        {
+            "product_id": product_id, "quantity": quantity, "slot": slot,
+            "holder": holder, "created_at": now, "expires_at": expires_at,
+        }
+        for product_id, quantity, slot in holds
+    ])
+
+def _release_holds(
+    db: Session, product_id: int, quantity: int, holder: Optional[str], newest_first: bool = False
+) -> Optional[Dict[Optional[int], int]]:
+    """Take ``quantity`` units off the product's reservations; returns the units claimed per
+    slot (None for the product row), or None if the reservations do not hold that many.
+
+    The holder's own reservations go first, then those of a randomly picked slot (for sharded
+    products), then the oldest (or, for cancellations, the newest). Reservation rows are locked
+    before the product row, the same order the expiry sweeper uses, and rows a concurrent checkout
+    has locked are skipped where the database supports it, so buyers of a hot product do not all
+    queue on its oldest reservation. Each claim is a guarded statement, so a row taken by a
+    concurrent checkout (where the database has no row locks) is skipped instead of being released twice.
+    """
+    reservation = models.Reservation
+    # Rotating the slots from a random start spreads concurrent holderless checkouts over them; one
+    # statement, so the product's shard count is read inline (NULL, so no preference, when unsharded)
+    shards = (
+        select(func.nullif(models.Product.shard_count, 0)).where(models.Product.id == product_id).scalar_subquery()
+    )
+    order = [
+        (reservation.slot + random.randrange(stock_shards.MAX_SHARDS)) % shards,
+        reservation.expires_at.desc() if newest_first else reservation.expires_at,
+        reservation.id,
+    ]
+    if holder is not None:
+        order.insert(0, case((reservation.holder == holder, 0), else_=1))
+    claimed: Dict[Optional[int], int] = {}
+    remaining = quantity
+    while remaining > 0:
+        candidates = (
+            select(reservation.id, reservation.quantity, reservation.slot)
+            .where(reservation.product_id == product_id)
+            .order_by(*order)
+            .limit(remaining)
+        )
+        # Only wait on locked rows when every free one is gone, to tell "all busy" from "none held"
+        holds = (
+            db.execute(candidates.with_for_update(of=reservation, skip_locked=True)).all()
+            or db.execute(candidates.with_for_update(of=reservation)).all()
+        )
+        if not holds:
+            return None
+        for hold_id, held, slot in holds:
+            taken = min(held, remaining)
+            if taken == held:
+                claim = delete(reservation).where(reservation.id == hold_id, reservation.quantity == held)
+            else:
+                claim = (
+                    update(reservation)
+                    .where(reservation.id == hold_id, reservation.quantity >= taken)
+                    .values(quantity=reservation.quantity - taken)
+                )
+            if db.execute(claim.execution_options(synchronize_session=False)).rowcount:
+                remaining -= taken
+                claimed[slot] = claimed.get(slot, 0) + taken
+            if remaining == 0:
+                break
+    return claimed
+
+def _sell_units(db: Session, product_id: int, quantity: int, sale_date: date) -> Optional[models.Product]:
+    product = _update_product_returning(
+        db, product_id,
+        models.Product.reserved_quantity >= quantity,
+        reserved_quantity=models.Product.reserved_quantity - quantity,
+        stock=models.Product.stock - quantity,
+    )
+    if product is None:
+        return None
+    if product.stock == 0 and product.is_available:
+        # Only the sale that empties the stock writes availability (and so invalidates the category tree);
+        # the row is already locked by the update above
+        product = _update_product_returning(db, product_id, is_available=False, sold_date=sale_date)
+        category_tree.mark_changed(db)
+    _record_sale(db, product, quantity, sale_date)
     return product
 
-def sell_product(db: Session, product_id: int) -> models.Product:
-    product = get_product_or_404(db, product_id)
+def _sell_shard_units(db: Session, product_id: int, slots: Dict[int, int], sale_date: date) -> Optional[models.Product]:
+    remaining = stock_shards.sell(db, product_id, slots)
+    if remaining is None:
+        return None
+    product = get_product_or_404(db, product_id, PRODUCT_SALE_LOAD)
+    if 0 in remaining and product.stock == 0 and product.is_available:
+        # Only the sale that empties the last slot touches the hot products row
+        product = _update_product_returning(db, product_id, is_available=False, sold_date=sale_date)
+        category_tree.mark_changed(db)
+        stock_shards.apply_totals(db, [product])
+    # Roll up under a slot this transaction already holds locked, so sharded sells share no rollup row
+    _record_sale(db, product, sum(slots.values()), sale_date, slot=min(slots))
+    return product
 
-    if product.reserved_quantity <= 0:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product not available for sale")
+def _sell_claimed(db: Session, product_id: int, claimed: Dict[Optional[int], int], sale_date: date) -> Optional[models.Product]:
+    # Units claimed from reservations are sold where they were held: the product row and/or slots
+    product = None
+    if claimed.get(None):
+        product = _sell_units(db, product_id, claimed[None], sale_date)
+        if product is None:
+            return None
+    slots = {slot: units for slot, units in claimed.items() if slot is not None}
+    if slots:
+        product = _sell_shard_units(db, product_id, slots, sale_date)
+    return product
+
+def _unreserve(db: Session, product_id: int, claimed: Dict[Optional[int], int]) -> Optional[models.Product]:
+    product = None
+    if claimed.get(None):
+        product = _update_product_returning(
+            db, product_id,
+            models.Product.reserved_quantity >= claimed[None],
+            reserved_quantity=models.Product.reserved_quantity - claimed[None],
+        )
+        if product is None:
+            return None
+    slots = {slot: units for slot, units in claimed.items() if slot is not None}
+    if slots:
+        if not stock_shards.release(db, product_id, slots):
+            return None
+        product = get_product_or_404(db, product_id)
+    return product
 
+def _record_sale(db: Session, product: models.Product, quantity: int, sale_date: date, slot: int = 0) -> None:
     # Применение скидки
-    discounted_price = apply_discount(db, product_id)
-    sale = models.Sale(
-        product_id=product_id,
-        actual_price=product.price,
-        discounted_price=discounted_price,
-        sale_date=date.today()
-    )
+    discounted_price = apply_discount(db, product)
+    record_sales(db, [
+        {
+            "product_id": product.id,
+            "actual_price": product.price,
+            "discounted_price": discounted_price,
+            "sale_date": sale_date,
+            "category_id": product.category_id,
+            "subcategory_id": product.subcategory_id,
+            "slot": slot,
+        }
+        for _ in range(quantity)
+    ])
 
-    product.reserved_quantity -= 1
-    product.stock -= 1
+def reserve_product(db: Session, product_id: int, holder: Optional[str] = None) -> models.Product:
+    reserved = _reserve(db, product_id, 1)
+    if reserved is None:
+        db.rollback()
+        get_product_or_404(db, product_id)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product is out of stock")
+    product, taken = reserved
+    _hold(db, [(product_id, units, slot) for slot, units in taken], holder)
+    db.commit()
+    product_cache.invalidate(product_id)
+    return product
 
-    if product.stock == 0:
-        product.is_available = False
-        product.sold_date = date.today()
+def cancel_reservation(db: Session, product_id: int, holder: Optional[str] = None) -> models.Product:
+    claimed = _release_holds(db, product_id, 1, holder, newest_first=True)
+    if not claimed:
+        db.rollback()
+        return get_product_or_404(db, product_id)
+    product = _unreserve(db, product_id, claimed)
+    if product is None:
+        db.rollback()
+        return get_product_or_404(db, product_id)
+    db.commit()
+    product_cache.invalidate(product_id)
+    return product
 
-    db.add(sale)
+def sell_product(db: Session, product_id: int, holder: Optional[str] = None) -> models.Product:
+    claimed = _release_holds(db, product_id, 1, holder)
+    product = _sell_claimed(db, product_id, claimed, date.today()) if claimed else None
+    if product is None:
+        db.rollback()
+        get_product_or_404(db, product_id)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product not available for sale")
     db.commit()
-    db.refresh(product)
+    product_cache.invalidate(product_id)
     return product
 
+def _merge_cart(items: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # Always lock rows in ascending id order so two overlapping carts cannot deadlock
+    quantities: Dict[int, int] = {}
+    for product_id, quantity in items:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return sorted(quantities.items())
+
+def reserve_cart(db: Session, items: List[Tuple[int, int]], holder: Optional[str] = None) -> List[models.Product]:
+    items = _merge_cart(items)
+    products = []
+    holds = []
+    for product_id, quantity in items:
+        reserved = _reserve(db, product_id, quantity)
+        if reserved is None:
+            db.rollback()
+            get_product_or_404(db, product_id)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product {product_id} does not have {quantity} unit(s) in stock"
+            )
+        product, taken = reserved
+        products.append(product)
+        holds.extend((product_id, units, slot) for slot, units in taken)
+    _hold(db, holds, holder)
+    db.commit()
+    product_cache.invalidate(*(product.id for product in products))
+    return products
+
+def _not_reserved(db: Session, product_id: int, quantity: int) -> HTTPException:
+    db.rollback()
+    get_product_or_404(db, product_id)
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Product {product_id} does not have {quantity} reserved unit(s)"
+    )
+
+def sell_cart(db: Session, items: List[Tuple[int, int]], holder: Optional[str] = None) -> List[models.Product]:
+    today = date.today()
+    items = _merge_cart(items)
+    # Every reservation is claimed before any product row is locked (see _release_holds)
+    claims = []
+    for product_id, quantity in items:
+        claimed = _release_holds(db, product_id, quantity, holder)
+        if not claimed:
+            raise _not_reserved(db, product_id, quantity)
+        claims.append(claimed)
+    products = []
+    for (product_id, quantity), claimed in zip(items, claims):
+        product = _sell_claimed(db, product_id, claimed, today)
+        if product is None:
+            raise _not_reserved(db, product_id, quantity)
+        products.append(product)
+    db.commit()
+    product_cache.invalidate(*(product.id for product in products))
+    return products
+
+def _promote(db: Session, criteria: List[Any], discount: float) -> List[int]:
+    """Put every product matching ``criteria`` at its original price less ``discount`` percent, in one UPDATE.
+
+    The original price is recorded by the first promotion, so a new percentage replaces the
+    running one instead of compounding on it. Returns the ids of the products updated.
+    """
+    if not (0 <= discount < 100):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Discount must be at least 0 and below 100")
+    product = models.Product
+    original_price = func.coalesce(product.original_price, product.price)
+    return db.execute(
+        update(product)
+        .where(*criteria)
+        .values(
+            original_price=original_price,
+            price=func.round(cast(original_price * (1 - discount / 100), Numeric), 2),
+        )
+        .returning(product.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+def _unpromote(db: Session, criteria: List[Any]) -> List[int]:
+    """Restore the recorded original price of every promoted product matching ``criteria``, in one UPDATE."""
+    product = models.Product
+    return db.execute(
+        update(product)
+        .where(*criteria, product.original_price.is_not(None))
+        .values(price=product.original_price, original_price=None)
+        .returning(product.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+def _promotion_scope(category_id: Optional[int], subcategory_id: Optional[int]) -> List[Any]:
+    criteria = []
+    if category_id is not None:
+        criteria.append(models.Product.category_id == category_id)
+    if subcategory_id is not None:
+        criteria.append(models.Product.subcategory_id == subcategory_id)
+    if not criteria:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="A promotion needs a category_id or a subcategory_id"
+        )
+    return criteria
+
 def start_promotion(db: Session, product_id: int, discount: float) -> models.Product:
-    if not (0 <= discount <= 100):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Discount must be between 0 and 100")
-    product = get_product_or_404(db, product_id)
-    product.discount = discount
-    product.price *= (1 - discount / 100)
+    if not _promote(db, [models.Product.id == product_id], discount):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     db.commit()
-    db.refresh(product)
+    product_cache.invalidate(product_id)
+    return get_product_or_404(db, product_id)
+
+def end_promotion(db: Session, product_id: int) -> models.Product:
+    _unpromote(db, [models.Product.id == product_id])
+    db.commit()
+    product_cache.invalidate(product_id)
+    return get_product_or_404(db, product_id)
+
+def start_bulk_promotion(
+    db: Session, discount: float, category_id: Optional[int] = None, subcategory_id: Optional[int] = None
+) -> Dict[str, int]:
+    """Promote every product of a category and/or subcategory at once (see _promote)."""
+    product_ids = _promote(db, _promotion_scope(category_id, subcategory_id), discount)
+    db.commit()
+    product_cache.invalidate(*product_ids)
+    return {"updated": len(product_ids)}
+
+def end_bulk_promotion(
+    db: Session, category_id: Optional[int] = None, subcategory_id: Optional[int] = None
+) -> Dict[str, int]:
+    product_ids = _unpromote(db, _promotion_scope(category_id, subcategory_id))
+    db.commit()
+    product_cache.invalidate(*product_ids)
+    return {"updated": len(product_ids)}
+
+def set_stock_shards(db: Session, product_id: int, shards: int) -> models.Product:
+    """Spread the product's stock over ``shards`` counter slots, or fold it back onto the row with 0.
+
+    Reservations already held move with their units (into slot 0, or back to the row).
+    """
+    if not (0 <= shards <= stock_shards.MAX_SHARDS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Shard count must be between 0 and {stock_shards.MAX_SHARDS}"
+        )
+    product = db.query(models.Product).filter(models.Product.id == product_id).with_for_update().populate_existing().first()
+    if product is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    shard = models.StockShard
+    slots = db.execute(
+        select(shard.stock, shard.reserved_quantity).where(shard.product_id == product_id).order_by(shard.slot).with_for_update()
+    ).all()
+    stock = product.stock + sum(slot_stock for slot_stock, _ in slots)
+    reserved_quantity = product.reserved_quantity + sum(slot_reserved for _, slot_reserved in slots)
+    db.execute(delete(shard).where(shard.product_id == product_id).execution_options(synchronize_session=False))
+    if shards:
+        db.execute(insert(shard), stock_shards.split(product_id, stock, reserved_quantity, shards))
+        product.stock, product.reserved_quantity = 0, 0
+    else:
+        product.stock, product.reserved_quantity = stock, reserved_quantity
+    product.shard_count = shards
+    db.execute(
+        update(models.Reservation)
+        .where(models.Reservation.product_id == product_id)
+        .values(slot=0 if shards else None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    product_cache.invalidate(product_id)
+    stock_shards.apply_totals(db, [product])
     return product
 
 def get_sold_products(
     db: Session,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    category_id: Optional[int] = None
+    category_id: Optional[int] = None,
+    columns: Optional[List] = None
 ) -> List[models.Product]:
-    query = db.query(models.Product).filter(models.Product.is_available == False)
-
-    if start_date:
-        query = query.filter(models.Product.sold_date >= start_date)
-    if end_date:
-        query = query.filter(models.Product.sold_date <= end_date)
-    if category_id:
-        query = query.filter(models.Product.category_id == category_id)
-    
-    return query.all()
+    query = filter_sold_products(
+        db.query(*columns) if columns else db.query(models.Product).options(PRODUCT_RESPONSE_LOAD),
+        start_date=start_date, end_date=end_date, category_id=category_id
+    )
+    items = query.all()
+    if not columns:
+        stock_shards.apply_totals(db, items)
+    return items
 
-def apply_discount(db: Session, product_id: int) -> float:
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if not product:
-        raise ValueError("Product not found")
-    
-    discount_value = 0.0
-    discounts = db.query(models.Discount).filter(
-        (models.Discount.product_id == product_id) |
-        (models.Discount.category_id == product.category_id) |
-        (models.Discount.subcategory_id == product.subcategory_id)
-    ).all()
-    
-    if discounts:
-        discount_value = max(discount.percentage for discount in discounts)
-    
-    discounted_price = product.price * (1 - discount_value / 100)
-    return discounted_price
\ No newline at end of file
+def apply_discount(db: Session, product: models.Product) -> float:
+    discount_value = discount_index.get_percentage(
+        db, product.id, product.category_id, product.subcategory_id
+    )
+    return product.price * (1 - discount_value / 100)
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.metrics import format_metric, metrics
+from ..db import database, models
+from .product_cache import product_cache
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SweepStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reservations = 0
+        self.units = 0
+
+    def add(self, reservations: int, units: int) -> None:
+        with self._lock:
+            self.reservations += reservations
+            self.units += units
+
+
+sweep_stats = SweepStats()
+
+
+def release_expired_batch(db: Session, now: datetime, batch_size: int) -> Dict[str, int]:
+    """Release one batch of expired reservations and commit: set-based UPDATEs of the product rows
+    and stock shard slots the units came from, then one DELETE.
+
+    On PostgreSQL the batch is claimed with SKIP LOCKED, so concurrent sweepers (one per
+    worker) and checkouts holding those rows never wait on each other.
+    """
+    reservation = models.Reservation
+    product = models.Product
+    claimed = db.execute(
+        select(reservation.id, reservation.quantity, reservation.slot)
+        .where(reservation.expires_at <= now)
+        .order_by(reservation.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not claimed:
+        db.rollback()
+        return {"reservations": 0, "units": 0}
+
+    ids = [reservation_id for reservation_id, _, _ in claimed]
+    product_ids = []
+    postgres = db.get_bind().dialect.name == "postgresql"
+    if any(slot is None for _, _, slot in claimed):
+        released = (
+            select(reservation.product_id, func.sum(reservation.quantity).label("quantity"))
+            .where(reservation.id.in_(ids), reservation.slot.is_(None))
+            .group_by(reservation.product_id)
+            .subquery("released")
+        )
+        if postgres:
+            # Lock the products in id order, as carts do, before the set-based update touches them
+            db.execute(select(product.id).where(product.id.in_(select(released.c.product_id))).order_by(product.id).with_for_update())
+        product_ids += db.execute(
+            update(product)
+            .where(product.id == released.c.product_id)
+            .values(reserved_quantity=product.reserved_quantity - released.c.quantity)
+            .returning(product.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+    if any(slot is not None for _, _, slot in claimed):
+        # Units held in stock_shards slots (sharded products) go back to their slots
+        shard = models.StockShard
+        released = (
+            select(reservation.product_id, reservation.slot, func.sum(reservation.quantity).label("quantity"))
+            .where(reservation.id.in_(ids), reservation.slot.is_not(None))
+            .group_by(reservation.product_id, reservation.slot)
+            .subquery("released_slots")
+        )
+        same_slot = (shard.product_id == released.c.product_id) & (shard.slot == released.c.slot)
+        if postgres:
+            db.execute(
+                select(shard.product_id).where(select(released.c.slot).where(same_slot).exists())
+                .order_by(shard.product_id, shard.slot).with_for_update()
+            )
+        product_ids += db.execute(
+            update(shard)
+            .where(same_slot)
+            .values(reserved_quantity=shard.reserved_quantity - released.c.quantity)
+            .returning(shard.product_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+    db.execute(delete(reservation).where(reservation.id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+
+    units = sum(quantity for _, quantity, _ in claimed)
+    product_cache.invalidate(*set(product_ids))
+    sweep_stats.add(len(ids), units)
+    return {"reservations": len(ids), "units": units}
+
+
+def release_expired_reservations(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> Dict[str, int]:
+    """Release expired reservations batch by batch, stopping after ``max_batches`` so one sweep stays bounded."""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.RESERVATION_SWEEP_BATCH
+    max_batches = max_batches or settings.RESERVATION_SWEEP_MAX_BATCHES
+    totals = {"reservations": 0, "units": 0, "batches": 0}
+    for _ in range(max_batches):
+        released = release_expired_batch(db, now, batch_size)
+        if not released["reservations"]:
+            break
+        totals["reservations"] += released["reservations"]
+        totals["units"] += released["units"]
+        totals["batches"] += 1
+        if released["reservations"] < batch_size:
+            break
+    return totals
+
+
+def sweep_expired_reservations() -> Dict[str, int]:
+    with database.SessionLocal() as db:
+        return release_expired_reservations(db)
+
+
+async def run_sweeper(interval: float) -> None:
+    """Background loop started by the app lifespan; the sweep itself runs in the threadpool."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            released = await run_in_threadpool(sweep_expired_reservations)
+        except Exception:
+            logger.exception("Reservation sweep failed")
+            continue
+        if released["reservations"]:
+            logger.info("Released %(units)d unit(s) from %(reservations)d expired reservation(s)", released)
+
+
+def _sweep_metric_lines():
+    return (
+        format_metric("reservations_expired_total", "counter", "Expired reservations released by the sweeper.",
+                      [((), sweep_stats.reservations)])
+        + format_metric("reservation_units_released_total", "counter", "Units returned to stock by the sweeper.",
+                        [((), sweep_stats.units)])
+    )
+
+
+metrics.add_collector(_sweep_metric_lines)
@@ -0,0 +1,202 @@
+import csv
+import io
+from sqlalchemy import Column, Date, Float, Integer, MetaData, String, Table, select, func, insert, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from ..db import models
+from datetime import date
+from typing import Optional, List, Dict, Any
+
+SALE_COLUMNS = ("product_id", "actual_price", "discounted_price", "sale_date", "record_id")
+
+# Per-connection scratch table: rows with record ids are COPYed here, then inserted into `sales`
+# with ON CONFLICT DO NOTHING, which COPY itself cannot do
+sales_copy = Table(
+    "sales_copy",
+    MetaData(),
+    Column("product_id", Integer),
+    Column("actual_price", Float),
+    Column("discounted_price", Float),
+    Column("sale_date", Date),
+    Column("record_id", String(32)),
+    prefixes=["TEMPORARY"],
+)
+
+REPORT_DIMENSIONS = {
+    "day": models.SalesDaily.sale_date.label("day"),
+    "category": models.SalesDaily.category_id.label("category_id"),
+    "subcategory": models.SalesDaily.subcategory_id.label("subcategory_id"),
+    "product": models.SalesDaily.product_id.label("product_id"),
+}
+
+def insert_sales(db: Session, rows: List[Dict[str, Any]], copy: bool = False) -> None:
+    """Insert sale rows in one round trip (executemany, or COPY on psycopg2 when ``copy``) and roll them up.
+
+    Rows may carry the product's ``category_id``/``subcategory_id`` for the rollup;
+    products without them are looked up in one query. A row's ``slot`` (default 0) picks its rollup row.
+    Rows with a ``record_id`` already in `sales` are skipped and left out of the rollup, so
+    inserting the same rows again changes nothing.
+    """
+    if not rows:
+        return
+    sale = models.Sale
+    records = [{column: row.get(column) for column in SALE_COLUMNS} for row in rows]
+    deduplicate = any(record["record_id"] for record in records)
+    bind = db.get_bind()
+    postgres = bind.dialect.name == "postgresql"
+    if copy and postgres and bind.dialect.driver == "psycopg2":
+        target = "sales"
+        if deduplicate:
+            db.execute(CreateTable(sales_copy, if_not_exists=True))
+            db.execute(sales_copy.delete())
+            target = "sales_copy"
+        buffer = io.StringIO()
+        # An empty unquoted field is NULL in CSV COPY, which is what a missing discount needs
+        csv.writer(buffer).writerows(
+            ["" if record[column] is None else record[column] for column in SALE_COLUMNS] for record in records
+        )
+        buffer.seek(0)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {target} ({', '.join(SALE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+        if deduplicate:
+            inserted = set(db.execute(
+                postgresql.insert(sale)
+                .from_select(SALE_COLUMNS, select(sales_copy))
+                .on_conflict_do_nothing(index_elements=[sale.record_id])
+                .returning(sale.record_id)
+            ).scalars())
+            db.execute(sales_copy.delete())
+    elif deduplicate:
+        inserted = set(db.execute(
+            (postgresql.insert if postgres else sqlite.insert)(sale)
+            .on_conflict_do_nothing(index_elements=[sale.record_id])
+            .returning(sale.record_id),
+            records,
+        ).scalars())
+    else:
+        db.execute(insert(sale), records)
+    if deduplicate:
+        rows = [row for row in rows if row.get("record_id") is None or row["record_id"] in inserted]
+        if not rows:
+            return
+    _roll_up(db, rows)
+
+def _roll_up(db: Session, rows: List[Dict[str, Any]]) -> None:
+    missing = {row["product_id"] for row in rows if "category_id" not in row}
+    categories = {}
+    if missing:
+        categories = {
+            product_id: (category_id, subcategory_id)
+            for product_id, category_id, subcategory_id in db.execute(
+                select(models.Product.id, models.Product.category_id, models.Product.subcategory_id)
+                .where(models.Product.id.in_(missing))
+            )
+        }
+
+    totals: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["sale_date"], row["product_id"], row.get("slot", 0))
+        total = totals.get(key)
+        if total is None:
+            category_id, subcategory_id = (
+                categories[row["product_id"]] if "category_id" not in row
+                else (row["category_id"], row.get("subcategory_id"))
+            )
+            total = totals[key] = {
+                "sale_date": row["sale_date"],
+                "product_id": row["product_id"],
+                "slot": key[2],
+                "category_id": category_id,
+                "subcategory_id": subcategory_id,
+                "units": 0,
+                "gross_revenue": 0.0,
+                "net_revenue": 0.0,
+            }
+        total["units"] += 1
+        total["gross_revenue"] += row["actual_price"]
+        total["net_revenue"] += row["actual_price"] if row["discounted_price"] is None else row["discounted_price"]
+
+    rollup = models.SalesDaily
+    upsert = (postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert)(rollup)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[rollup.sale_date, rollup.product_id, rollup.slot],
+        set_={
+            "units": rollup.units + upsert.excluded.units,
+            "gross_revenue": rollup.gross_revenue + upsert.excluded.gross_revenue,
+            "net_revenue": rollup.net_revenue + upsert.excluded.net_revenue,
+        },
+    )
+    # Key order keeps concurrent batches from locking the same rollup rows in opposite orders
+    db.execute(upsert, [totals[key] for key in sorted(totals)])
+
+def backfill_sales_daily(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """Rebuild the rollup for a date range (everything by default) from `sales` and commit.
+
+    Delete and re-aggregate run in one transaction; returns the number of rollup rows written.
+    """
+    rollup = models.SalesDaily
+    sale = models.Sale
+    product = models.Product
+    cleared = delete(rollup)
+    source = (
+        select(
+            sale.sale_date, sale.product_id, product.category_id, product.subcategory_id,
+            func.count(sale.id),
+            func.sum(sale.actual_price),
+            func.sum(func.coalesce(sale.discounted_price, sale.actual_price)),
+        )
+        .join(product, product.id == sale.product_id)
+        .group_by(sale.sale_date, sale.product_id, product.category_id, product.subcategory_id)
+    )
+    if start_date:
+        cleared = cleared.where(rollup.sale_date >= start_date)
+        source = source.where(sale.sale_date >= start_date)
+    if end_date:
+        cleared = cleared.where(rollup.sale_date <= end_date)
+        source = source.where(sale.sale_date <= end_date)
+
+    db.execute(cleared)
+    written = db.execute(
+        insert(rollup).from_select(
+            ["sale_date", "product_id", "category_id", "subcategory_id", "units", "gross_revenue", "net_revenue"],
+            source,
+        )
+    ).rowcount
+    db.commit()
+    return written
+
+def get_sales_report(
+    db: Session,
+    group_by: List[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    # Aggregates the daily rollup, so a range costs one row per day and product rather than per sale
+    rollup = models.SalesDaily
+    dimensions = [REPORT_DIMENSIONS[name] for name in dict.fromkeys(group_by)]
+    query = select(
+        *dimensions,
+        func.coalesce(func.sum(rollup.units), 0).label("units"),
+        func.sum(rollup.gross_revenue).label("gross_revenue"),
+        func.sum(rollup.net_revenue).label("net_revenue"),
+    )
+
+    if start_date:
+        query = query.where(rollup.sale_date >= start_date)
+    if end_date:
+        query = query.where(rollup.sale_date <= end_date)
+    if category_id is not None:
+        query = query.where(rollup.category_id == category_id)
+    if subcategory_id is not None:
+        query = query.where(rollup.subcategory_id == subcategory_id)
+
+    if dimensions:
+        query = query.group_by(*dimensions).order_by(*dimensions)
+
+    return [dict(row) for row in db.execute(query).mappings()]
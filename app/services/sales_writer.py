@@ -0,0 +1,329 @@
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import date
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.metrics import format_metric, metrics
+from ..db import database
+from .sales_service import insert_sales
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING_SALES_KEY = "write_behind_sales"
+FLUSHING_SUFFIX = ".flushing"
+LOCK_SUFFIX = ".lock"
+REJECTED_SUFFIX = ".rejected"
+
+
+class SaleWriter:
+    """Write-behind buffer for the sales log.
+
+    Committed sales are appended to an in-process queue and to an NDJSON spill file,
+    and a background thread inserts them in batches once ``flush_size`` rows are
+    queued or ``flush_interval`` seconds have passed; with ``fsync`` that thread also
+    syncs the spill file shortly after each append, off the request path. Before a
+    flush the spill file is rotated aside and it is only deleted after the batch
+    commits. A crash between the batch commit and the delete replays that batch, but
+    every spilled row carries a ``record_id`` that `insert_sales` skips once present,
+    so the replay adds nothing to `sales` or the rollup.
+
+    Each process spills to ``<spill_path>.<pid>`` and holds an exclusive lock on
+    ``<spill_path>.<pid>.lock`` while it runs, so workers sharing one ``spill_path``
+    never touch each other's rows; `start` replays only the files of processes
+    whose lock is free, i.e. that have exited.
+
+    A batch the database refuses because of its rows is split until the offending
+    rows are isolated; those go to ``<spill_path>.rejected`` so the queue keeps moving.
+    Other failures (a lost connection) requeue the whole batch for the next attempt.
+    """
+
+    def __init__(
+        self,
+        spill_path: str,
+        flush_size: int = 500,
+        flush_interval: float = 1.0,
+        fsync: bool = True,
+        enabled: bool = False,
+    ):
+        self.spill_path = spill_path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.enabled = enabled
+        self.flushed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._pending: List[Dict[str, Any]] = []
+        self._unsynced = False
+        # Rotated spill files whose rows are queued (or being flushed) and not yet committed
+        self._batch_files: List[str] = []
+        self._spill = None
+        self._owner = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def path(self) -> str:
+        """This process's spill file."""
+        return f"{self.spill_path}.{os.getpid()}"
+
+    def start(self) -> int:
+        """Replay rows spilled by exited processes, then open this process's spill file and start flushing.
+
+        Returns the number of recovered rows. Safe to call more than once.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return 0
+            # Workers booting together take turns, so each orphaned file is replayed once
+            with open(self.spill_path + LOCK_SUFFIX, "a") as recovery:
+                fcntl.flock(recovery, fcntl.LOCK_EX)
+                self._owner = open(self.path + LOCK_SUFFIX, "a")
+                try:
+                    fcntl.flock(self._owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    recovered = self._recover()
+                    self._spill = open(self.path, "a", encoding="utf-8")
+                except Exception:
+                    self._owner.close()
+                    self._owner = None
+                    raise
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="sales-writer", daemon=True)
+            self._thread.start()
+        return recovered
+
+    def enqueue(self, rows: List[Dict[str, Any]]) -> None:
+        if self._thread is None:
+            self.start()
+        # The id lets a replay of the spill file skip rows an earlier flush already committed
+        rows = [{"record_id": uuid.uuid4().hex, **row} for row in rows]
+        lines = "".join(json.dumps(_to_record(row)) + "\n" for row in rows)
+        with self._lock:
+            self._spill.write(lines)
+            self._spill.flush()
+            self._unsynced = self.fsync
+            self._pending.extend(rows)
+            full = len(self._pending) >= self.flush_size
+        # Callers may be on the event loop, so the fsync is left to the flusher thread too
+        if full or self.fsync:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Insert everything queued so far in one batch; returns the number of rows written."""
+        self._sync()
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                rows, self._pending = self._pending, []
+                self._rotate()
+                files = list(self._batch_files)
+            try:
+                refused = self._write(rows)
+            except Exception:
+                # Requeue ahead of newer rows; their rotated files stay until a flush commits. Halves
+                # that did commit are skipped by record id when the batch is retried
+                with self._lock:
+                    self._pending[:0] = rows
+                raise
+            self._reject(refused)
+            with self._lock:
+                self._batch_files = [path for path in self._batch_files if path not in files]
+                self.flushed += len(rows) - len(refused)
+            for path in files:
+                os.remove(path)
+            return len(rows) - len(refused)
+
+    def close(self) -> None:
+        """Stop the background thread and flush what is left; called on shutdown."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Final sales flush failed; %d row(s) stay in the spill file for the next start", self.pending)
+        with self._lock:
+            self._spill.close()
+            self._spill = None
+            self._thread = None
+            if not self._pending and not self._batch_files:
+                os.remove(self.path)
+                os.remove(self.path + LOCK_SUFFIX)
+            # Unlocking hands anything left over to the next process that starts
+            self._owner.close()
+            self._owner = None
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stopping.is_set():
+            self._wake.wait(max(deadline - time.monotonic(), 0))
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                self._sync()
+                if len(self._pending) < self.flush_size and time.monotonic() < deadline:
+                    continue
+                deadline = time.monotonic() + self.flush_interval
+                self.flush()
+            except Exception:
+                logger.exception("Sales flush failed; %d row(s) queued for the next attempt", self.pending)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert ``rows``, halving the batch around rows the database refuses; returns those rows."""
+        try:
+            with database.SessionLocal() as db:
+                insert_sales(db, rows, copy=True)
+                db.commit()
+            return []
+        except Exception as error:
+            if not _is_row_error(error):
+                raise
+            if len(rows) == 1:
+                return rows
+        middle = len(rows) // 2
+        return self._write(rows[:middle]) + self._write(rows[middle:])
+
+    def _reject(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        path = self.spill_path + REJECTED_SUFFIX
+        with open(path, "a", encoding="utf-8") as rejected:
+            rejected.write("".join(json.dumps(row, default=str) + "\n" for row in rows))
+            rejected.flush()
+            os.fsync(rejected.fileno())
+        with self._lock:
+            self.rejected += len(rows)
+        logger.error("Moved %d sale(s) the database refused to %s", len(rows), path)
+
+    def _sync(self) -> None:
+        with self._lock:
+            if not self._unsynced or self._spill is None:
+                return
+            self._unsynced = False
+            # A duplicate descriptor survives a rotation closing the file, so enqueue never waits on the disk
+            fd = os.dup(self._spill.fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _rotate(self) -> None:
+        # Caller holds self._lock
+        self._spill.close()
+        path = f"{self.path}.{uuid.uuid4().hex}{FLUSHING_SUFFIX}"
+        os.replace(self.path, path)
+        self._batch_files.append(path)
+        self._spill = open(self.path, "a", encoding="utf-8")
+
+    def _recover(self) -> int:
+        # Caller holds self._lock and the recovery lock. Claims the spill files (live file and any
+        # batch left mid-flush) of every process whose lock is free, plus a previous process that had our pid
+        paths, claimed = [], []
+        for lock_path in sorted(glob.glob(glob.escape(self.spill_path) + ".*" + LOCK_SUFFIX)):
+            spill_path = lock_path[:-len(LOCK_SUFFIX)]
+            if spill_path != self.path:
+                owner = open(lock_path, "a")
+                try:
+                    fcntl.flock(owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    owner.close()
+                    continue
+                claimed.append(owner)
+            paths.extend(sorted(glob.glob(glob.escape(spill_path) + ".*" + FLUSHING_SUFFIX)))
+            if os.path.exists(spill_path):
+                paths.append(spill_path)
+        rows = []
+        for path in paths:
+            with open(path, encoding="utf-8") as spill:
+                # A torn last line from a crash mid-append was never acknowledged; skip it
+                for line in spill:
+                    try:
+                        rows.append(_from_record(json.loads(line)))
+                    except ValueError:
+                        logger.warning("Skipping unreadable line in sales spill file %s", path)
+        if rows:
+            self._reject(self._write(rows))
+            logger.info("Recovered %d spilled sale(s)", len(rows))
+        for path in paths:
+            os.remove(path)
+        for owner in claimed:
+            os.remove(owner.name)
+            owner.close()
+        return len(rows)
+
+
+def _is_row_error(error: Exception) -> bool:
+    # Errors caused by the rows themselves: constraint and data errors, or a malformed spilled record
+    if isinstance(error, exc.StatementError) and not isinstance(error, exc.DBAPIError):
+        error = error.orig
+    return isinstance(error, (exc.IntegrityError, exc.DataError, KeyError, TypeError, ValueError))
+
+
+def _to_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {**row, "sale_date": row["sale_date"].isoformat()}
+
+
+def _from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    # Extra keys (the product's category ids) ride along for the rollup
+    return {**record, "sale_date": date.fromisoformat(record["sale_date"])}
+
+
+sales_writer = SaleWriter(
+    settings.SALES_SPILL_PATH,
+    flush_size=settings.SALES_FLUSH_SIZE,
+    flush_interval=settings.SALES_FLUSH_INTERVAL,
+    fsync=settings.SALES_SPILL_FSYNC,
+    enabled=settings.SALES_WRITE_BEHIND,
+)
+
+
+def record_sales(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Log sale rows as part of the current transaction, or queue them for write-behind once it commits."""
+    if sales_writer.enabled:
+        db.info.setdefault(PENDING_SALES_KEY, []).extend(rows)
+    else:
+        insert_sales(db, rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed_sales(session):
+    rows = session.info.pop(PENDING_SALES_KEY, None)
+    if rows:
+        sales_writer.enqueue(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_sales(session):
+    session.info.pop(PENDING_SALES_KEY, None)
+
+
+def _sales_writer_metric_lines():
+    return (
+        format_metric("sales_write_behind_pending", "gauge", "Sale rows queued for the next write-behind flush.",
+                      [((), sales_writer.pending)])
+        + format_metric("sales_write_behind_flushed_total", "counter", "Sale rows written by write-behind flushes.",
+                        [((), sales_writer.flushed)])
+        + format_metric("sales_write_behind_rejected_total", "counter",
+                        "Sale rows the database refused, moved to the rejected file.", [((), sales_writer.rejected)])
+    )
+
+
+metrics.add_collector(_sales_writer_metric_lines)
@@ -0,0 +1,100 @@
+import re
+from sqlalchemy import Float, cast, column, func, literal, literal_column, select, table
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..db import models
+from .pagination import keyset_page
+from .products_service import filter_products
+from typing import Any, List, Optional, Tuple
+
+SEARCH_MODES = ("prefix", "substring", "fuzzy")
+
+# Trigram indexes (pg_trgm, FTS5 trigram) only help from three characters on
+MIN_TRIGRAM_LENGTH = 3
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+products_fts = table("products_fts", column("rowid"), column("rank"))
+products_trgm = table("products_trgm", column("rowid"), column("rank"))
+
+
+def _terms(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+LIKE_ESCAPE = "!"
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _trigrams(text: str) -> List[str]:
+    text = text.lower()
+    return sorted({text[i:i + MIN_TRIGRAM_LENGTH] for i in range(len(text) - MIN_TRIGRAM_LENGTH + 1)})
+
+
+def _postgres_search(db: Session, query, mode: str, text: str):
+    name = models.Product.name
+    if mode == "prefix":
+        # Every word must start a word of the name; served by the tsvector GIN index
+        tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in _terms(text)))
+        document = func.to_tsvector(literal_column("'simple'"), func.coalesce(name, literal_column("''")))
+        rank = -cast(func.ts_rank(document, tsquery), Float)
+        return query.filter(document.op("@@")(tsquery)), rank
+    if mode == "substring":
+        rank = -cast(func.similarity(name, text), Float)
+        return query.filter(name.ilike(f"%{_escape_like(text)}%", escape=LIKE_ESCAPE)), rank
+    # Fuzzy: the query is similar to some part of the name (`<%` uses the trigram GIN index)
+    db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(settings.SEARCH_FUZZY_THRESHOLD), True)))
+    rank = -cast(func.word_similarity(text, name), Float)
+    return query.filter(literal(text, name.type).op("<%")(name)), rank
+
+
+def _sqlite_search(db: Session, query, mode: str, text: str):
+    if mode == "prefix":
+        match = " ".join(_fts_phrase(term) + "*" for term in _terms(text))
+        index = products_fts
+    elif len(text) < MIN_TRIGRAM_LENGTH:
+        # Too short for trigrams: plain LIKE, shortest names first
+        name = models.Product.name
+        return query.filter(name.like(f"%{_escape_like(text)}%", escape=LIKE_ESCAPE)), func.length(name)
+    elif mode == "substring":
+        match = _fts_phrase(text)
+        index = products_trgm
+    else:
+        # Fuzzy: any shared trigram matches, bm25 ranks names sharing more (and rarer) trigrams first
+        match = " OR ".join(_fts_phrase(trigram) for trigram in _trigrams(text))
+        index = products_trgm
+    query = query.select_from(index).join(models.Product, models.Product.id == index.c.rowid)
+    return query.filter(literal_column(index.name).op("MATCH")(match)), index.c.rank
+
+
+def search_products(
+    db: Session,
+    text: str,
+    mode: str = "substring",
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None,
+    columns: Optional[List] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """Products whose name matches ``text``, best match first, a keyset page at a time.
+
+    Rows are column tuples (``columns``, by default every product column) followed by the rank.
+    """
+    text = text.strip()
+    if not text or (mode == "prefix" and not _terms(text)):
+        return [], None
+    dialect = db.get_bind().dialect.name
+    search = _postgres_search if dialect == "postgresql" else _sqlite_search
+    query, rank = search(db, db.query(*(columns or models.Product.__table__.columns)), mode, text)
+    rank = rank.label("rank")
+    query = filter_products(query.add_columns(rank), category_id=category_id, subcategory_id=subcategory_id)
+    # The cursor is bound to the query it came from
+    return keyset_page(query, f"{mode}:{text}", rank, models.Product.id, limit, cursor=cursor)
@@ -0,0 +1,68 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+_CHANGED = "snapshot_caches_changed"
+
+
+class SnapshotCache(Generic[T]):
+    """In-process copy of a value built from the database, dropped when a committed write invalidates it.
+
+    Modules detect their own writes (session events) and call `mark_changed`; the snapshot is
+    invalidated once that session commits, and never on rollback. A build that overlaps an
+    invalidation is returned to its caller but not kept. `ttl` bounds how long another worker
+    process, whose commits this one never sees, can keep serving a stale copy.
+    """
+
+    def __init__(self, build: Callable[[Session], T], ttl: float = 60.0):
+        self.build = build
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._loaded_at: Optional[float] = None
+        self._value: Optional[T] = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def load(self, db: Session, keep: bool = True) -> T:
+        with self._lock:
+            generation = self._generation
+        value = self.build(db)
+        if not keep:
+            return value
+        with self._lock:
+            # A write committed while we were reading makes this value stale; serve it, don't keep it
+            if generation == self._generation:
+                self._value = value
+                self._loaded_at = time.monotonic()
+        return value
+
+    def get(self, db: Session, keep: bool = True) -> T:
+        """The kept value while fresh, else a new build; ``keep=False`` builds without keeping (e.g. on a replica)."""
+        if self.is_fresh():
+            return self._value
+        return self.load(db, keep)
+
+    def mark_changed(self, session: Session) -> None:
+        session.info.setdefault(_CHANGED, set()).add(self)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    for cache in session.info.pop(_CHANGED, ()):
+        cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_CHANGED, None)
@@ -0,0 +1,146 @@
+import random
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from ..db import models
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Sharded inventory for flash-sale products. A product with shard_count > 0 keeps its stock in
+# that many stock_shards slot rows; reservations and sales take units from a slot, so buyers of
+# one hot product contend on N row locks instead of its single products row. Totals are the
+# products row plus the sum of its slots.
+
+MAX_SHARDS = 64
+TOTALED_COLUMNS = ("stock", "reserved_quantity")
+# Rounds of re-reading free slot units before a reservation gives up on a racing slot
+GATHER_ROUNDS = 3
+
+
+def _total(key: str):
+    shard = models.StockShard
+    column = getattr(models.Product, key)
+    slots = (
+        select(func.coalesce(func.sum(getattr(shard, key)), 0))
+        .where(shard.product_id == models.Product.id)
+        .scalar_subquery()
+    )
+    # The slot subquery is only evaluated for sharded rows
+    return case((models.Product.shard_count > 0, column + slots), else_=column)
+
+
+def total_columns(columns: Sequence[Any]) -> List[Any]:
+    """Swap products.stock / reserved_quantity in a product column list for totals of the same name."""
+    return [_total(column.key).label(column.key) if column.key in TOTALED_COLUMNS else column for column in columns]
+
+
+def apply_totals(db: Session, products: Sequence[models.Product]) -> None:
+    """Show the stock and reserved_quantity totals on loaded sharded products (one query, none when unsharded).
+
+    The values are set as committed state, so they are never flushed back to the products row;
+    callers load the products with populate_existing so the row values they add to are fresh.
+    """
+    sharded = {product.id: product for product in products if product.shard_count}
+    if not sharded:
+        return
+    shard = models.StockShard
+    rows = db.execute(
+        select(shard.product_id, func.sum(shard.stock), func.sum(shard.reserved_quantity))
+        .where(shard.product_id.in_(sharded))
+        .group_by(shard.product_id)
+    )
+    for product_id, stock, reserved_quantity in rows:
+        product = sharded[product_id]
+        set_committed_value(product, "stock", product.stock + stock)
+        set_committed_value(product, "reserved_quantity", product.reserved_quantity + reserved_quantity)
+
+
+def split(product_id: int, stock: int, reserved_quantity: int, shards: int) -> List[Dict[str, int]]:
+    """Slot rows for ``stock`` units: free units spread evenly, existing reservations held in slot 0."""
+    base, extra = divmod(stock - reserved_quantity, shards)
+    return [
+        {
+            "product_id": product_id,
+            "slot": slot,
+            "stock": base + (1 if slot < extra else 0) + (reserved_quantity if slot == 0 else 0),
+            "reserved_quantity": reserved_quantity if slot == 0 else 0,
+        }
+        for slot in range(shards)
+    ]
+
+
+def _take(db: Session, product_id: int, slot: int, quantity: int) -> bool:
+    shard = models.StockShard
+    return bool(db.execute(
+        update(shard)
+        .where(
+            shard.product_id == product_id,
+            shard.slot == slot,
+            shard.stock - shard.reserved_quantity >= quantity,
+        )
+        .values(reserved_quantity=shard.reserved_quantity + quantity)
+        .execution_options(synchronize_session=False)
+    ).rowcount)
+
+
+def reserve(db: Session, product_id: int, shards: int, quantity: int) -> Optional[List[Tuple[int, int]]]:
+    """Reserve ``quantity`` units from the product's slots; returns the (slot, units) taken.
+
+    A random slot serves the whole quantity in one guarded UPDATE when it can; otherwise the
+    units are gathered from whichever slots still have free ones. None means the slots do not
+    hold that many free units; slots already taken are undone by the caller's rollback.
+    """
+    first = random.randrange(shards)
+    if _take(db, product_id, first, quantity):
+        return [(first, quantity)]
+
+    shard = models.StockShard
+    taken: List[Tuple[int, int]] = []
+    remaining = quantity
+    for _ in range(GATHER_ROUNDS):
+        free = db.execute(
+            select(shard.slot, shard.stock - shard.reserved_quantity)
+            .where(shard.product_id == product_id, shard.stock > shard.reserved_quantity)
+        ).all()
+        if not free:
+            return None
+        random.shuffle(free)
+        for slot, available in free:
+            units = min(available, remaining)
+            if _take(db, product_id, slot, units):
+                taken.append((slot, units))
+                remaining -= units
+                if remaining == 0:
+                    return taken
+    return None
+
+
+def release(db: Session, product_id: int, slots: Dict[int, int]) -> bool:
+    """Return reserved units to their slots (a cancellation); False if a slot holds fewer."""
+    shard = models.StockShard
+    for slot, units in sorted(slots.items()):
+        if not db.execute(
+            update(shard)
+            .where(shard.product_id == product_id, shard.slot == slot, shard.reserved_quantity >= units)
+            .values(reserved_quantity=shard.reserved_quantity - units)
+            .execution_options(synchronize_session=False)
+        ).rowcount:
+            return False
+    return True
+
+
+def sell(db: Session, product_id: int, slots: Dict[int, int]) -> Optional[List[int]]:
+    """Sell reserved units out of their slots; returns the slots' remaining stock, or None if one fell short."""
+    shard = models.StockShard
+    remaining = []
+    for slot, units in sorted(slots.items()):
+        left = db.execute(
+            update(shard)
+            .where(shard.product_id == product_id, shard.slot == slot, shard.reserved_quantity >= units)
+            .values(reserved_quantity=shard.reserved_quantity - units, stock=shard.stock - units)
+            .returning(shard.stock)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        if left is None:
+            return None
+        remaining.append(left)
+    return remaining
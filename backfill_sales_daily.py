@@ -0,0 +1,20 @@
+import argparse
+import json
+import sys
+from datetime import date
+from app.db.database import SessionLocal
+from app.services.sales_service import backfill_sales_daily
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the sales_daily rollup from the sales table.")
+    parser.add_argument("--start-date", type=date.fromisoformat, help="First day to rebuild (default: earliest sale)")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Last day to rebuild (default: latest sale)")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        written = backfill_sales_daily(db, args.start_date, args.end_date)
+    print(json.dumps({"rows": written}))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from httpx import AsyncClient, ASGITransport
+from app.core.config import settings
+from app.db import database
+from .harness import compare_to_baseline, run_scenario
+from .scenarios import SCENARIOS
+from .seed import drop_dataset, seed_dataset
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+async def run(args, dataset):
+    if args.url:
+        client = AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        from app.main import app
+        client = AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+    results = {}
+    async with client:
+        for name in args.scenario:
+            results[name] = await run_scenario(
+                client, SCENARIOS[name], dataset, args.operations, args.concurrency, seed=args.seed
+            )
+            print(f"{name}: {results[name]['throughput_ops']} ops/s, p50 {results[name]['p50_ms']} ms, "
+                  f"p99 {results[name]['p99_ms']} ms, {results[name]['errors']} errors", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the store's hot paths and compare with a stored baseline.")
+    parser.add_argument("--url", help="Base URL of a running server (e.g. uvicorn); the ASGI app is driven in-process when omitted")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run; repeat for several (default: all)")
+    parser.add_argument("--products", type=int, default=2000, help="Size of the seeded catalog")
+    parser.add_argument("--operations", type=int, default=500, help="Operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the workers")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed throughput drop / p99 rise against the baseline, as a fraction")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--keep-data", action="store_true", help="Leave the seeded dataset in the database")
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or list(SCENARIOS)
+
+    # The server behind --url must point at the same DATABASE_URL; seeding goes straight to the database
+    database.init_db()
+    dataset = seed_dataset(args.products)
+    try:
+        results = asyncio.run(run(args, dataset))
+    finally:
+        if not args.keep_data:
+            drop_dataset(dataset)
+
+    report = {
+        "config": {
+            "target": args.url or "asgi",
+            "backend": database.engine.dialect.name,
+            "async_db": settings.ASYNC_DB,
+            "products": args.products,
+            "operations": args.operations,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("config") != report["config"]:
+            print("warning: baseline was recorded with a different configuration", file=sys.stderr)
+        report["regressions"] = compare_to_baseline(results, baseline["scenarios"], args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            baseline_file.write(output + "\n")
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
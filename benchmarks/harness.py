@@ -0,0 +1,92 @@
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from httpx import AsyncClient
+from .scenarios import Scenario
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(
+    client: AsyncClient,
+    scenario: Scenario,
+    dataset: Dict[str, Any],
+    operations: int,
+    concurrency: int,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Run ``operations`` scenario operations spread over ``concurrency`` workers.
+
+    Latency is measured per operation (which may issue several requests);
+    throughput is operations per second of wall-clock time.
+    """
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    remaining = operations
+
+    async def worker(index: int) -> None:
+        nonlocal remaining, errors
+        rng = random.Random(seed * 1000 + index)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                responses = await scenario.operation(client, dataset, rng)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            for response in responses:
+                statuses[response.status_code] += 1
+            if any(response.status_code not in scenario.expected for response in responses):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "operations": operations,
+        "requests": sum(statuses.values()),
+        "errors": errors,
+        "status_counts": {str(code): count for code, count in sorted(statuses.items())},
+        "duration_s": round(elapsed, 4),
+        "throughput_ops": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+) -> List[str]:
+    """Describe every scenario whose throughput fell or p99 rose by more than ``tolerance`` (a fraction)."""
+    regressions = []
+    for name, result in results.items():
+        reference: Optional[Dict[str, Any]] = baseline.get(name)
+        if reference is None:
+            continue
+        if result["throughput_ops"] < reference["throughput_ops"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['throughput_ops']} ops/s, baseline {reference['throughput_ops']} ops/s"
+            )
+        if result["p99_ms"] > reference["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {result['p99_ms']} ms, baseline {reference['p99_ms']} ms")
+        if result["errors"] > reference.get("errors", 0):
+            regressions.append(f"{name}: {result['errors']} errors, baseline {reference.get('errors', 0)}")
+    return regressions
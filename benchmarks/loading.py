@@ -0,0 +1,80 @@
+import argparse
+import json
+import sys
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
+from app.db import database, models
+from app.schemas import ProductResponse
+from app.services.products_service import PRODUCT_RESPONSE_LOAD
+from .seed import drop_dataset, seed_dataset
+
+# What every product query paid while Product.category/subcategory were lazy="joined"
+JOINED = (joinedload(models.Product.category), joinedload(models.Product.subcategory))
+STRATEGIES = {
+    "joined": JOINED,
+    "load_only": (PRODUCT_RESPONSE_LOAD,),
+}
+
+
+def product_detail(db, dataset, options):
+    product_id = dataset["hot_product_id"]
+    product = db.query(models.Product).options(*options).filter(models.Product.id == product_id).first()
+    return [ProductResponse.model_validate(product)]
+
+
+def product_list(db, dataset, options):
+    products = db.query(models.Product).options(*options).filter(
+        models.Product.category_id == dataset["category_ids"][0]
+    ).order_by(models.Product.id).limit(100).all()
+    return [ProductResponse.model_validate(product) for product in products]
+
+
+PATHS = {"product_detail": product_detail, "product_list": product_list}
+
+
+def measure(products: int, repeat: int):
+    dataset = seed_dataset(products)
+    widths = []
+
+    def record_width(conn, cursor, statement, parameters, context, executemany):
+        if cursor.description:
+            widths.append(len(cursor.description))
+
+    results = {}
+    event.listen(database.engine, "after_cursor_execute", record_width)
+    try:
+        for path_name, path in PATHS.items():
+            for strategy, options in STRATEGIES.items():
+                timings = []
+                for _ in range(repeat):
+                    # New session per run, so each strategy loads and hydrates its rows instead of reusing cached objects
+                    with database.SessionLocal() as db:
+                        widths.clear()
+                        started = time.perf_counter()
+                        path(db, dataset, options)
+                        timings.append(time.perf_counter() - started)
+                results[f"{path_name}/{strategy}"] = {
+                    "columns": widths[0],
+                    "best_ms": round(min(timings) * 1000, 3),
+                }
+    finally:
+        event.remove(database.engine, "after_cursor_execute", record_width)
+        drop_dataset(dataset)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Row width and query time of product reads: joined relationships versus load_only."
+    )
+    parser.add_argument("--products", type=int, default=2000, help="Catalog size to seed")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+    database.init_db()
+    print(json.dumps(measure(args.products, args.repeat), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import random
+from httpx import AsyncClient, Response
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Set
+
+Operation = Callable[[AsyncClient, Dict[str, Any], random.Random], Awaitable[List[Response]]]
+
+
+class Scenario(NamedTuple):
+    operation: Operation
+    # Statuses that are part of the scenario rather than failures
+    expected: Set[int]
+
+
+async def browse_catalog(client, dataset, rng):
+    """A category listing followed for up to three cursor pages."""
+    params = {
+        "category_id": rng.choice(dataset["category_ids"]),
+        "sort": rng.choice(["id", "name", "price"]),
+        "limit": 20,
+    }
+    responses = []
+    for _ in range(3):
+        response = await client.get("/products/", params=params)
+        responses.append(response)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+    return responses
+
+
+async def product_detail(client, dataset, rng):
+    return [await client.get(f"/products/{rng.choice(dataset['product_ids'])}")]
+
+
+async def flash_sale(client, dataset, rng):
+    """Every worker reserves and sells the same product, so all of them contend for one row."""
+    product_id = dataset["hot_product_id"]
+    reserved = await client.post(f"/products/{product_id}/reserve")
+    if reserved.status_code != 200:
+        return [reserved]
+    return [reserved, await client.post(f"/products/{product_id}/sell")]
+
+
+async def checkout(client, dataset, rng):
+    """Browse, look at a few products, then reserve and sell them as one cart."""
+    responses = [await client.get("/products/", params={"category_id": rng.choice(dataset["category_ids"]), "limit": 20})]
+    picked = rng.sample(dataset["product_ids"], k=min(3, len(dataset["product_ids"])))
+    for product_id in picked:
+        responses.append(await client.get(f"/products/{product_id}"))
+    cart = {"items": [{"product_id": product_id, "quantity": rng.randint(1, 2)} for product_id in picked]}
+    reserved = await client.post("/products/cart/reserve", json=cart)
+    responses.append(reserved)
+    if reserved.status_code == 200:
+        responses.append(await client.post("/products/cart/sell", json=cart))
+    return responses
+
+
+async def sales_reporting(client, dataset, rng):
+    params = {
+        "group_by": rng.choice([["day"], ["category"], ["day", "category"], ["product"]]),
+        "start_date": dataset["start_date"],
+        "end_date": dataset["end_date"],
+    }
+    if "product" in params["group_by"]:
+        params["category_id"] = rng.choice(dataset["category_ids"])
+    return [await client.get("/sales/report", params=params)]
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "catalog": Scenario(browse_catalog, {200}),
+    "product_detail": Scenario(product_detail, {200}),
+    # A reservation taken by another worker makes a sell fail with 400; that is the contention being measured
+    "flash_sale": Scenario(flash_sale, {200, 400}),
+    "checkout": Scenario(checkout, {200, 400}),
+    "sales_report": Scenario(sales_reporting, {200}),
+}
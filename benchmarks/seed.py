@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+from uuid import uuid4
+from sqlalchemy import insert
+from app.db import database, models
+from app.services import sales_service
+from typing import Any, Dict
+
+CATEGORY_COUNT = 4
+SUBCATEGORIES_PER_CATEGORY = 2
+# Stock is large enough that selling scenarios measure contention, not running out
+STOCK = 1_000_000
+
+
+def seed_dataset(products: int, days: int = 30) -> Dict[str, Any]:
+    """Insert a catalog of ``products`` items with one sale each, spread over the last ``days`` days.
+
+    Every name carries a run prefix so a dataset can be seeded next to real data
+    and removed again with `drop_dataset`.
+    """
+    prefix = f"Bench {uuid4().hex[:8]}"
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    with database.SessionLocal() as db:
+        categories = [models.Category(name=f"{prefix} Category {i}") for i in range(CATEGORY_COUNT)]
+        db.add_all(categories)
+        db.flush()
+        subcategories = [
+            models.Subcategory(name=f"{prefix} Subcategory {category.id}.{i}", category_id=category.id)
+            for category in categories
+            for i in range(SUBCATEGORIES_PER_CATEGORY)
+        ]
+        db.add_all(subcategories)
+        db.flush()
+
+        db.execute(insert(models.Product), [
+            {
+                "name": f"{prefix} Product {i}",
+                "category_id": subcategories[i % len(subcategories)].category_id,
+                "subcategory_id": subcategories[i % len(subcategories)].id,
+                "price": float(5 + i % 200),
+                "stock": STOCK,
+                "reserved_quantity": 0,
+                "is_available": True,
+            }
+            for i in range(products)
+        ])
+        product_ids = [
+            product_id for (product_id,) in
+            db.query(models.Product.id).filter(models.Product.name.like(f"{prefix} Product %")).order_by(models.Product.id)
+        ]
+        sales_service.insert_sales(db, [
+            {
+                "product_id": product_id,
+                "actual_price": 10.0,
+                "discounted_price": 10.0,
+                "sale_date": start + timedelta(days=i % days),
+            }
+            for i, product_id in enumerate(product_ids)
+        ])
+        db.commit()
+    return {
+        "prefix": prefix,
+        "category_ids": [category.id for category in categories],
+        "subcategory_ids": [subcategory.id for subcategory in subcategories],
+        "product_ids": product_ids,
+        "hot_product_id": product_ids[0],
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+    }
+
+
+def drop_dataset(dataset: Dict[str, Any]) -> None:
+    with database.SessionLocal() as db:
+        product_ids = dataset["product_ids"]
+        db.query(models.SalesDaily).filter(models.SalesDaily.product_id.in_(product_ids)).delete(synchronize_session=False)
+        db.query(models.Sale).filter(models.Sale.product_id.in_(product_ids)).delete(synchronize_session=False)
+        db.query(models.Product).filter(models.Product.id.in_(product_ids)).delete(synchronize_session=False)
+        db.query(models.Subcategory).filter(
+            models.Subcategory.id.in_(dataset["subcategory_ids"])
+        ).delete(synchronize_session=False)
+        db.query(models.Category).filter(models.Category.id.in_(dataset["category_ids"])).delete(synchronize_session=False)
+        db.commit()
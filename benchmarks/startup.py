@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from .harness import percentile
+
+# Runs in a fresh interpreter per sample: import cost is only meaningful cold
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app, lifespan
+imported = time.perf_counter()
+
+async def start():
+    context = lifespan(app)
+    await context.__aenter__()
+    ready = time.perf_counter()
+    await context.__aexit__(None, None, None)
+    return ready
+
+ready = asyncio.run(start())
+print(json.dumps({"import_ms": (imported - started) * 1000, "lifespan_ms": (ready - imported) * 1000}))
+"""
+
+
+def measure(runs: int):
+    samples = {"import_ms": [], "lifespan_ms": [], "process_ms": []}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=root, check=True, capture_output=True, text=True
+        ).stdout
+        samples["process_ms"].append((time.perf_counter() - started) * 1000)
+        for key, value in json.loads(output.strip().splitlines()[-1]).items():
+            samples[key].append(value)
+    return {
+        key: {
+            "p50": round(percentile(sorted(values), 0.5), 2),
+            "max": round(max(values), 2),
+        }
+        for key, values in samples.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time a cold import of app.main and the lifespan startup in fresh interpreters."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps({"runs": args.runs, **measure(args.runs)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
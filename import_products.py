@@ -0,0 +1,24 @@
+import argparse
+import json
+import sys
+from app.services.import_service import import_feed, IMPORT_BATCH_SIZE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import (upsert) products from an NDJSON or CSV feed.")
+    parser.add_argument("path", help="Feed file, or - to read from stdin")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Defaults to csv for *.csv files, ndjson otherwise")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    import_format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    if args.path == "-":
+        summary = import_feed(sys.stdin.buffer, import_format, args.batch_size)
+    else:
+        with open(args.path, "rb") as feed:
+            summary = import_feed(feed, import_format, args.batch_size)
+
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
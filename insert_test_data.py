@@ -1,34 +1,30 @@
 from app.db.database import SessionLocal
 from app.db.models import Category, Subcategory
 
+CATEGORIES = {
+    'Electronics': ['Mobile Phones', 'Laptops'],
+    'Books': ['Fiction', 'Non-fiction'],
+}
+
 def insert_test_data():
     db = SessionLocal()
     try:
-        # Check if categories exist, add them only if they are absent
-        electronics = db.query(Category).filter_by(name='Electronics').first()
-        if not electronics:
-            electronics = Category(name='Electronics')
-            db.add(electronics)
-
-        books = db.query(Category).filter_by(name='Books').first()
-        if not books:
-            books = Category(name='Books')
-            db.add(books)
+        # Look up every seeded name at once and add only the absent ones
+        existing = {c.name: c for c in db.query(Category).filter(Category.name.in_(CATEGORIES))}
+        db.add_all(Category(name=name) for name in CATEGORIES if name not in existing)
         db.commit()
+        categories = {c.name: c.id for c in db.query(Category).filter(Category.name.in_(CATEGORIES))}
 
-        # Check if subcategories exist, add them only if they are absent
-        if not db.query(Subcategory).filter_by(name='Mobile Phones').first():
-            mobile_phones = Subcategory(name='Mobile Phones', category_id=electronics.id)
-            db.add(mobile_phones)
-        if not db.query(Subcategory).filter_by(name='Laptops').first():
-            laptops = Subcategory(name='Laptops', category_id=electronics.id)
-            db.add(laptops)
-        if not db.query(Subcategory).filter_by(name='Fiction').first():
-            fiction = Subcategory(name='Fiction', category_id=books.id)
-            db.add(fiction)
-        if not db.query(Subcategory).filter_by(name='Non-fiction').first():
-            non_fiction = Subcategory(name='Non-fiction', category_id=books.id)
-            db.add(non_fiction)
+        subcategory_names = [name for names in CATEGORIES.values() for name in names]
+        existing_subcategories = {
+            name for (name,) in db.query(Subcategory.name).filter(Subcategory.name.in_(subcategory_names))
+        }
+        db.add_all(
+            Subcategory(name=name, category_id=categories[category])
+            for category, names in CATEGORIES.items()
+            for name in names
+            if name not in existing_subcategories
+        )
         db.commit()
     finally:
         db.close()
@@ -1,7 +1,12 @@
 import pytest
+from uuid import uuid4
 from httpx import AsyncClient, ASGITransport
 from app.main import app
 
+# Utility function for names that must not collide with rows left by earlier runs
+def unique_name(prefix):
+    return f"{prefix} {uuid4().hex[:8]}"
+
 # Utility function to create a category for tests
 async def create_test_category(ac, name="Test Category"):
     response = await ac.get("/categories/")
@@ -121,3 +126,101 @@ async def test_sell_product():
         assert product_after_sell["is_available"] is False
         print("Product after sell:", product_after_sell)
         
+
+@pytest.mark.asyncio
+async def test_reserve_does_not_oversell():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac)
+        product = await create_test_product(ac, name="Last Unit", category_id=category["id"], stock=1)
+        product_id = product["id"]
+
+        first = await ac.post(f"/products/{product_id}/reserve")
+        assert first.status_code == 200
+        second = await ac.post(f"/products/{product_id}/reserve")
+        assert second.status_code == 400
+        assert (await ac.get(f"/products/{product_id}")).json()["reserved_quantity"] == 1
+
+@pytest.mark.asyncio
+async def test_sell_requires_reservation():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac)
+        product = await create_test_product(ac, name="Unreserved Product", category_id=category["id"])
+
+        sell_response = await ac.post(f"/products/{product['id']}/sell")
+        assert sell_response.status_code == 400
+        assert (await ac.post("/products/999999/reserve")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_cart_reserve_and_sell():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac)
+        first = await create_test_product(ac, name="Cart Product A", category_id=category["id"], stock=3)
+        second = await create_test_product(ac, name="Cart Product B", category_id=category["id"], stock=1)
+        cart = {"items": [
+            {"product_id": second["id"], "quantity": 1},
+            {"product_id": first["id"], "quantity": 2},
+        ]}
+
+        reserve_response = await ac.post("/products/cart/reserve", json=cart)
+        assert reserve_response.status_code == 200
+        assert [p["reserved_quantity"] for p in reserve_response.json()] == [2, 1]
+
+        sell_response = await ac.post("/products/cart/sell", json=cart)
+        assert sell_response.status_code == 200
+        sold = {p["id"]: p for p in sell_response.json()}
+        assert sold[first["id"]]["stock"] == 1
+        assert sold[second["id"]]["is_available"] is False
+
+@pytest.mark.asyncio
+async def test_cart_reserve_is_all_or_nothing():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac)
+        available = await create_test_product(ac, name="Cart In Stock", category_id=category["id"], stock=5)
+        scarce = await create_test_product(ac, name="Cart Scarce", category_id=category["id"], stock=1)
+        cart = {"items": [
+            {"product_id": available["id"], "quantity": 1},
+            {"product_id": scarce["id"], "quantity": 2},
+        ]}
+
+        response = await ac.post("/products/cart/reserve", json=cart)
+        assert response.status_code == 400
+        assert (await ac.get(f"/products/{available['id']}")).json()["reserved_quantity"] == 0
+
+@pytest.mark.asyncio
+async def test_read_products_with_cursor():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, name=unique_name("Cursor Category"))
+        created = [
+            await create_test_product(ac, name=f"Cursor Product {i}", category_id=category["id"], price=price)
+            for i, price in enumerate([30.0, 10.0, 20.0, 10.0, 40.0])
+        ]
+
+        params = {"category_id": category["id"], "sort": "price", "limit": 2}
+        seen = []
+        response = await ac.get("/products/", params=params)
+        while True:
+            assert response.status_code == 200
+            seen.extend(response.json())
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if next_cursor is None:
+                break
+            response = await ac.get("/products/", params={**params, "cursor": next_cursor})
+
+        assert [p["price"] for p in seen] == [10.0, 10.0, 20.0, 30.0, 40.0]
+        assert sorted(p["id"] for p in seen) == sorted(p["id"] for p in created)
+
+@pytest.mark.asyncio
+async def test_read_products_rejects_bad_cursor():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/products/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_pool_stats():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.get("/products/")
+        response = await ac.get("/monitoring/pool")
+    assert response.status_code == 200
+    stats = response.json()["sync"]
+    assert stats["checked_out"] >= 0
+    assert "+Inf" in stats["checkout_wait_seconds"]["buckets"]
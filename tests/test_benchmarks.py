@@ -0,0 +1,35 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from benchmarks.harness import compare_to_baseline, percentile, run_scenario
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import drop_dataset, seed_dataset
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {"catalog": {"throughput_ops": 100.0, "p99_ms": 10.0, "errors": 0}}
+    assert compare_to_baseline({"catalog": {"throughput_ops": 90.0, "p99_ms": 11.0, "errors": 0}}, baseline, 0.25) == []
+    regressions = compare_to_baseline({"catalog": {"throughput_ops": 50.0, "p99_ms": 20.0, "errors": 1}}, baseline, 0.25)
+    assert len(regressions) == 3
+
+@pytest.fixture(scope="module")
+def dataset():
+    dataset = seed_dataset(products=40, days=5)
+    try:
+        yield dataset
+    finally:
+        drop_dataset(dataset)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", list(SCENARIOS))
+async def test_scenario_runs_without_errors(dataset, name):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        result = await run_scenario(ac, SCENARIOS[name], dataset, operations=6, concurrency=3)
+    assert result["errors"] == 0
+    assert result["requests"] >= 6
+    assert result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
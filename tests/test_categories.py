@@ -0,0 +1,62 @@
+import json
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.profiling import assert_max_queries
+from app.db import models
+from app.db.database import SessionLocal
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+def add_subcategory(category_id, name):
+    with SessionLocal() as db:
+        subcategory = models.Subcategory(name=name, category_id=category_id)
+        db.add(subcategory)
+        db.commit()
+        return subcategory.id
+
+async def tree_node(ac, category_id):
+    response = await ac.get("/categories/tree")
+    assert response.status_code == 200
+    return next(node for node in response.json() if node["id"] == category_id)
+
+@pytest.mark.asyncio
+async def test_category_tree_counts_available_products():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Tree Category"))
+        laptops = add_subcategory(category["id"], unique_name("Tree Laptops"))
+        phones = add_subcategory(category["id"], unique_name("Tree Phones"))
+        laptop_ids = [(await create_test_product(ac, unique_name("Tree Laptop"), category["id"]))["id"] for _ in range(2)]
+        with SessionLocal() as db:
+            db.query(models.Product).filter(models.Product.id.in_(laptop_ids)).update({"subcategory_id": laptops})
+            db.commit()
+        loose = await create_test_product(ac, unique_name("Tree Loose"), category["id"], stock=1)
+
+        node = await tree_node(ac, category["id"])
+        assert node["available_products"] == 3
+        assert {child["id"]: child["available_products"] for child in node["subcategories"]} == {laptops: 2, phones: 0}
+
+        # Served from the in-process copy until a write commits
+        with assert_max_queries(0):
+            await ac.get("/categories/tree")
+
+        # Reserving, cancelling, selling and repricing leave the counts, and the cached tree, alone
+        laptop = laptop_ids[0]
+        await ac.post(f"/products/{laptop}/reserve")
+        await ac.delete(f"/products/{laptop}/cancel-reservation")
+        await ac.post(f"/products/{laptop}/reserve")
+        await ac.post(f"/products/{laptop}/sell")
+        await ac.patch(f"/products/{laptop}/price", json={"new_price": 5.0})
+        with assert_max_queries(0):
+            await ac.get("/categories/tree")
+
+        # Selling out the last unit makes the product unavailable and invalidates the tree
+        await ac.post(f"/products/{loose['id']}/reserve")
+        await ac.post(f"/products/{loose['id']}/sell")
+        node = await tree_node(ac, category["id"])
+        assert node["available_products"] == 2
+
+        # Restocking it through an import makes it available again, which the import merge reports to the tree
+        feed = json.dumps({"name": loose["name"], "category_id": category["id"], "price": 5, "stock": 4})
+        assert (await ac.post("/products/import", content=feed)).json()["updated"] == 1
+        node = await tree_node(ac, category["id"])
+        assert node["available_products"] == 3
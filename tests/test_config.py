@@ -0,0 +1,50 @@
+from app.core.config import to_async_url
+
+
+def test_async_url_for_postgres():
+    assert to_async_url("postgresql://u:p@localhost:5432/db") == "postgresql+asyncpg://u:p@localhost:5432/db"
+    assert to_async_url("postgresql+psycopg2://u:p@localhost/db") == "postgresql+asyncpg://u:p@localhost/db"
+
+
+def test_async_url_for_sqlite():
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def test_engine_options_for_postgres(monkeypatch):
+    from app.db.database import engine_options, settings
+    from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    monkeypatch.setattr(settings, "DB_LOCK_TIMEOUT_MS", 1000)
+
+    options = engine_options("postgresql://u:p@localhost/db")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 20
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000 -c lock_timeout=1000"}
+
+    async_options = engine_options("postgresql+asyncpg://u:p@localhost/db", is_async=True)
+    assert async_options["poolclass"] is InstrumentedAsyncQueuePool
+    assert async_options["connect_args"] == {
+        "server_settings": {"statement_timeout": "5000", "lock_timeout": "1000"}
+    }
+
+
+def test_replica_urls_follow_the_primary_driver(monkeypatch):
+    from app.core.config import Settings
+
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", "postgresql://u:p@replica-1/db, postgresql://u:p@replica-2/db")
+    configured = Settings()
+    assert configured.DATABASE_REPLICA_URLS == ["postgresql://u:p@replica-1/db", "postgresql://u:p@replica-2/db"]
+    assert configured.ASYNC_DATABASE_REPLICA_URLS == [
+        "postgresql+asyncpg://u:p@replica-1/db", "postgresql+asyncpg://u:p@replica-2/db"
+    ]
+
+
+def test_pool_pre_ping_is_opt_in(monkeypatch):
+    from app.core.config import Settings
+
+    monkeypatch.delenv("DB_POOL_PRE_PING", raising=False)
+    assert Settings().DB_POOL_PRE_PING is False
+    monkeypatch.setenv("DB_POOL_PRE_PING", "1")
+    assert Settings().DB_POOL_PRE_PING is True
@@ -0,0 +1,65 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.db import models
+from sqlalchemy import event
+from app.db.database import SessionLocal, engine
+from app.services.discount_index import DiscountIndex
+from tests.test_api import create_test_category, unique_name, create_test_product
+
+async def reserve_and_sell(ac, product_id):
+    assert (await ac.post(f"/products/{product_id}/reserve")).status_code == 200
+    assert (await ac.post(f"/products/{product_id}/sell")).status_code == 200
+
+def last_sale_price(product_id):
+    with SessionLocal() as db:
+        sale = db.query(models.Sale).filter(models.Sale.product_id == product_id).order_by(models.Sale.id.desc()).first()
+        return sale.discounted_price
+
+@pytest.mark.asyncio
+async def test_sale_uses_highest_discount_and_sees_changes():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, name=unique_name("Discounted Category"))
+        product = await create_test_product(ac, name="Discounted Product", category_id=category["id"], price=100.0)
+        product_id = product["id"]
+
+        with SessionLocal() as db:
+            category_discount = models.Discount(percentage=10, category_id=category["id"])
+            db.add_all([category_discount, models.Discount(percentage=20, product_id=product_id)])
+            db.commit()
+            category_discount_id = category_discount.id
+
+        await reserve_and_sell(ac, product_id)
+        assert last_sale_price(product_id) == pytest.approx(80.0)
+
+        with SessionLocal() as db:
+            db.get(models.Discount, category_discount_id).percentage = 50
+            db.commit()
+
+        await reserve_and_sell(ac, product_id)
+        assert last_sale_price(product_id) == pytest.approx(50.0)
+
+def test_discount_applies_when_a_concurrent_invalidation_drops_the_load():
+    index = DiscountIndex(ttl=60)
+    with SessionLocal() as db:
+        discount = models.Discount(percentage=15, product_id=987654)
+        db.add(discount)
+        db.commit()
+
+        fired = []
+
+        def invalidate_once(conn, cursor, statement, parameters, context, executemany):
+            if not fired:
+                fired.append(statement)
+                index.invalidate()  # another session commits a discount change mid-load
+
+        event.listen(engine, "after_cursor_execute", invalidate_once)
+        try:
+            assert index.get_percentage(db, 987654) == 15
+        finally:
+            event.remove(engine, "after_cursor_execute", invalidate_once)
+        # The racing snapshot was not kept; the next lookup reloads it
+        assert not index.is_fresh()
+        assert index.get_percentage(db, 987654) == 15
+        db.delete(discount)
+        db.commit()
@@ -0,0 +1,81 @@
+import json
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from insert_test_data import insert_test_data
+from tests.test_api import create_test_category, create_test_product, unique_name
+
+@pytest.mark.asyncio
+async def test_import_upserts_and_reports_errors():
+    insert_test_data()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, name=unique_name("Import Category"))
+        phone = unique_name("Imported Phone")
+        feed = "\n".join(json.dumps(row) for row in [
+            {"name": phone, "category": "Electronics", "subcategory": "Mobile Phones", "price": 300, "stock": 5},
+            {"name": "Imported Item", "category_id": category["id"], "price": 10, "stock": 1},
+            {"name": "Bad Price", "category_id": category["id"], "price": -1, "stock": 1},
+            {"name": "Wrong Subcategory", "category": "Books", "subcategory": "Laptops", "price": 5, "stock": 1},
+        ]) + "\nnot json\n"
+
+        response = await ac.post("/products/import", content=feed, params={"batch_size": 2})
+        assert response.status_code == 200
+        report = response.json()
+        assert (report["inserted"], report["updated"], report["failed"]) == (2, 0, 3)
+        assert [error["line"] for batch in report["batches"] for error in batch["errors"]] == [3, 4, 5]
+
+        csv_feed = "name,category_id,price,stock\nImported Item,%d,12.5,7\n" % category["id"]
+        response = await ac.post("/products/import", content=csv_feed, params={"format": "csv"})
+        assert (response.json()["inserted"], response.json()["updated"]) == (0, 1)
+
+        products = (await ac.get("/products/", params={"category_id": category["id"]})).json()
+        assert [(p["name"], p["price"], p["stock"]) for p in products] == [("Imported Item", 12.5, 7)]
+
+@pytest.mark.asyncio
+async def test_import_keeps_reservations_and_recomputes_availability():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, name=unique_name("Restock Category"))
+        held = await create_test_product(ac, unique_name("Held Product"), category["id"], stock=5)
+        sold_out = await create_test_product(ac, unique_name("Sold Out Product"), category["id"], stock=1)
+        for _ in range(3):
+            await ac.post(f"/products/{held['id']}/reserve")
+        await ac.post(f"/products/{sold_out['id']}/reserve")
+        await ac.post(f"/products/{sold_out['id']}/sell")
+        assert (await ac.get(f"/products/{sold_out['id']}")).json()["is_available"] is False
+
+        feed = "\n".join(json.dumps(row) for row in [
+            {"name": held["name"], "category_id": category["id"], "price": 10, "stock": 1},
+            {"name": sold_out["name"], "category_id": category["id"], "price": 10, "stock": 4},
+        ])
+        report = (await ac.post("/products/import", content=feed)).json()
+        assert (report["updated"], report["failed"]) == (1, 1)
+        assert [error["line"] for error in report["batches"][0]["errors"]] == [1]
+
+        detail = (await ac.get(f"/products/{held['id']}")).json()
+        assert (detail["stock"], detail["reserved_quantity"]) == (5, 3)
+        detail = (await ac.get(f"/products/{sold_out['id']}")).json()
+        assert (detail["stock"], detail["is_available"]) == (4, True)
+        sold = (await ac.get("/products/sold/", params={"category_id": category["id"]})).json()
+        assert sold == []
+
+@pytest.mark.asyncio
+async def test_import_reports_names_shared_by_several_products():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, name=unique_name("Duplicate Category"))
+        name = unique_name("Duplicate Product")
+        twins = [await create_test_product(ac, name, category["id"], stock=2) for _ in range(2)]
+        single = await create_test_product(ac, unique_name("Single Product"), category["id"], stock=2)
+
+        feed = "\n".join(json.dumps(row) for row in [
+            {"name": name, "category_id": category["id"], "price": 10, "stock": 9},
+            {"name": single["name"], "category_id": category["id"], "price": 10, "stock": 9},
+        ])
+        report = (await ac.post("/products/import", content=feed)).json()
+        assert (report["inserted"], report["updated"], report["failed"]) == (0, 1, 1)
+        [error] = report["batches"][0]["errors"]
+        assert error["line"] == 1 and "duplicates" in error["error"]
+
+        # Neither duplicate is overwritten
+        for twin in twins:
+            assert (await ac.get(f"/products/{twin['id']}")).json()["stock"] == 2
+        assert (await ac.get(f"/products/{single['id']}")).json()["stock"] == 9
@@ -0,0 +1,46 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from app.main import app
+from app.db.database import SessionLocal, engine
+from app.services import products_service
+from app.services.products_service import PRODUCT_NAMES_LOAD, PRODUCT_RESPONSE_LOAD
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+def captured_statements(call):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        result = call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return result, statements
+
+@pytest.mark.asyncio
+async def test_products_load_response_columns_only():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Loading Category"))
+        product = await create_test_product(ac, unique_name("Loading Product"), category["id"])
+
+    with SessionLocal() as db:
+        loaded, statements = captured_statements(lambda: products_service.get_product_or_404(db, product["id"]))
+        assert len(statements) == 1
+        assert "JOIN" not in statements[0] and "sold_date" not in statements[0]
+        # Anything the response does not use raises instead of issuing a lazy load
+        with pytest.raises(InvalidRequestError):
+            loaded.category
+        with pytest.raises(InvalidRequestError):
+            loaded.sold_date
+
+    with SessionLocal() as db:
+        loaded, statements = captured_statements(
+            lambda: products_service.get_product_or_404(db, product["id"], PRODUCT_RESPONSE_LOAD, *PRODUCT_NAMES_LOAD)
+        )
+        assert len(statements) == 1
+        assert loaded.category.name == category["name"]
+        assert loaded.subcategory is None
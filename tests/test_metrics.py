@@ -0,0 +1,35 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.histogram import Histogram
+from app.core.metrics import MetricsRegistry
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == {"0.1": 1, "1.0": 3, "+Inf": 4}
+    assert histogram.count == 4
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    registry.observe_request("GET", "/products/{product_id}", 200, 0.02)
+    registry.observe_statement("UPDATE", "products", 0.001, 1)
+    text = registry.render()
+    assert 'http_requests_total{method="GET",route="/products/{product_id}",status="200"} 1' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/products/{product_id}",le="0.025"} 1' in text
+    assert 'db_statement_rows_total{operation="UPDATE",table="products"} 1' in text
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_and_sql():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.get("/products/")
+        await ac.get("/products/999999")
+        response = await ac.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/products/{product_id}",status="404"}' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/products/"}' in text
+    assert 'db_statement_duration_seconds_count{operation="SELECT",table="products"}' in text
+    assert "http_requests_in_flight 1" in text
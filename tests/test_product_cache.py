@@ -0,0 +1,61 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services.product_cache import (
+    CacheBackend, InMemoryKeyValueStore, KeyValueCacheBackend, LRUCacheBackend, ProductCache
+)
+from tests.test_api import create_test_category, create_test_product
+
+def test_lru_backend_evicts_least_recently_used():
+    backend = LRUCacheBackend(maxsize=2, ttl=60)
+    backend.set("1", {"id": 1})
+    backend.set("2", {"id": 2})
+    backend.get("1")
+    backend.set("3", {"id": 3})
+    assert backend.get("2") is None
+    assert backend.get("1") == {"id": 1}
+    assert len(backend) == 2
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class GetOnlyBackend(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyBackend()
+
+def test_load_started_before_invalidation_is_not_cached():
+    cache = ProductCache(KeyValueCacheBackend(InMemoryKeyValueStore(), ttl=60))
+
+    def slow_loader():
+        cache.invalidate(1)  # a writer commits while the row is being read
+        return {"id": 1, "price": 1.0}
+
+    cache.load(1, slow_loader)
+    assert cache.get(1) is None
+    cache.load(1, lambda: {"id": 1, "price": 2.0})
+    assert cache.get(1) == {"id": 1, "price": 2.0}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_product_reads_are_cached_and_invalidated_by_writes():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac)
+        product = await create_test_product(ac, name="Cached Product", category_id=category["id"])
+        product_id = product["id"]
+
+        before = (await ac.get("/products/cache/stats")).json()
+        await ac.get(f"/products/{product_id}")
+        cached = await ac.get(f"/products/{product_id}")
+        after = (await ac.get("/products/cache/stats")).json()
+        assert cached.json()["name"] == "Cached Product"
+        if after["enabled"]:
+            assert after["hits"] == before["hits"] + 1
+            assert after["misses"] == before["misses"] + 1
+
+        await ac.patch(f"/products/{product_id}/price", json={"new_price": 42.0})
+        assert (await ac.get(f"/products/{product_id}")).json()["price"] == 42.0
+        await ac.post(f"/products/{product_id}/reserve")
+        assert (await ac.get(f"/products/{product_id}")).json()["reserved_quantity"] == 1
+        await ac.delete(f"/products/{product_id}")
+        assert (await ac.get(f"/products/{product_id}")).status_code == 404
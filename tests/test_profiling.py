@@ -0,0 +1,69 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.config import settings
+from app.core.profiling import QueryProfile, QueryProfilerMiddleware, assert_max_queries
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+def test_profile_flags_repeated_statements():
+    profile = QueryProfile()
+    for _ in range(3):
+        profile.record("SELECT * FROM discounts WHERE product_id = ?", 0.001)
+    profile.record("SELECT * FROM products WHERE id = ?", 0.002)
+    assert profile.count == 4
+    assert profile.repeated(3) == {"SELECT * FROM discounts WHERE product_id = ?": 3}
+    assert profile.repeated(4) == {}
+
+@pytest.mark.asyncio
+async def test_profiler_middleware_reports_queries_in_headers():
+    profiled_app = app if settings.QUERY_PROFILING else QueryProfilerMiddleware(app)
+    async with AsyncClient(transport=ASGITransport(app=profiled_app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Profiled Category"))
+        products = [
+            await create_test_product(ac, unique_name("Profiled Product"), category["id"], stock=5)
+            for _ in range(3)
+        ]
+        response = await ac.get("/products/", params={"category_id": category["id"]})
+        assert response.headers["X-Query-Count"] == "1"
+        assert float(response.headers["X-Query-Time-Ms"]) >= 0
+        assert response.headers["X-Repeated-Queries"] == "0"
+
+        # The cart reserves product by product: one identical UPDATE per line is flagged
+        response = await ac.post("/products/cart/reserve", json={
+            "items": [{"product_id": product["id"], "quantity": 1} for product in products]
+        })
+        assert response.status_code == 200
+        assert response.headers["X-Repeated-Queries"] == "3"
+
+@pytest.mark.asyncio
+async def test_assert_max_queries_fails_over_budget():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        with pytest.raises(AssertionError, match="Expected at most 0 queries"):
+            with assert_max_queries(0):
+                await ac.get("/categories/")
+
+@pytest.mark.asyncio
+async def test_endpoint_query_budgets():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Budget Category"))
+        product = await create_test_product(ac, unique_name("Budget Product"), category["id"], stock=5)
+        product_id = product["id"]
+
+        with assert_max_queries(1):
+            await ac.get("/products/", params={"category_id": category["id"]})
+        with assert_max_queries(1):
+            await ac.get(f"/products/{product_id}")
+        with assert_max_queries(1):
+            await ac.get("/categories/")
+        # Guarded UPDATE ... RETURNING, reservation insert
+        with assert_max_queries(2):
+            await ac.post(f"/products/{product_id}/reserve")
+        # Reservation lookup and delete, guarded UPDATE ... RETURNING, discount index (re)load, sale insert,
+        # sales_daily upsert
+        with assert_max_queries(6):
+            response = await ac.post(f"/products/{product_id}/sell")
+        assert response.status_code == 200
+        with assert_max_queries(1):
+            await ac.get("/sales/report")
+        with assert_max_queries(1):
+            await ac.get("/products/sold/")
@@ -0,0 +1,69 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.profiling import assert_max_queries
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.products_service import end_bulk_promotion, start_bulk_promotion
+from tests.test_api import unique_name, create_test_category, create_test_product
+from tests.test_categories import add_subcategory
+
+async def prices(ac, products):
+    details = [(await ac.get(f"/products/{product['id']}")).json() for product in products]
+    return [(detail["price"], detail["original_price"]) for detail in details]
+
+@pytest.mark.asyncio
+async def test_category_promotion_applies_and_reverts_in_one_statement():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Promo Category"))
+        other = await create_test_category(ac, unique_name("Promo Other Category"))
+        products = [
+            await create_test_product(ac, unique_name("Promo Product"), category["id"], price=price)
+            for price in (100.0, 50.0, 19.99)
+        ]
+        bystander = await create_test_product(ac, unique_name("Promo Bystander"), other["id"], price=10.0)
+
+        with SessionLocal() as db, assert_max_queries(1):
+            assert start_bulk_promotion(db, 20, category_id=category["id"]) == {"updated": 3}
+        assert await prices(ac, products) == [(80.0, 100.0), (40.0, 50.0), (15.99, 19.99)]
+        assert await prices(ac, [bystander]) == [(10.0, None)]
+
+        # A new percentage replaces the running one instead of compounding
+        response = await ac.post("/products/promotions", json={"discount": 50, "category_id": category["id"]})
+        assert response.json() == {"updated": 3}
+        assert await prices(ac, products) == [(50.0, 100.0), (25.0, 50.0), (10.0, 19.99)]
+
+        # An explicit price ends that product's promotion
+        await ac.patch(f"/products/{products[0]['id']}/price", json={"new_price": 120.0})
+
+        with SessionLocal() as db, assert_max_queries(1):
+            assert end_bulk_promotion(db, category_id=category["id"]) == {"updated": 2}
+        assert await prices(ac, products) == [(120.0, None), (50.0, None), (19.99, None)]
+        response = await ac.delete("/products/promotions", params={"category_id": category["id"]})
+        assert response.json() == {"updated": 0}
+
+@pytest.mark.asyncio
+async def test_subcategory_and_single_product_promotions():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Promo Sub Category"))
+        subcategory_id = add_subcategory(category["id"], unique_name("Promo Subcategory"))
+        inside = await create_test_product(ac, unique_name("Promo Inside"), category["id"], price=40.0)
+        outside = await create_test_product(ac, unique_name("Promo Outside"), category["id"], price=40.0)
+        with SessionLocal() as db:
+            db.query(models.Product).filter(models.Product.id == inside["id"]).update({"subcategory_id": subcategory_id})
+            db.commit()
+
+        response = await ac.post("/products/promotions", json={"discount": 25, "subcategory_id": subcategory_id})
+        assert response.json() == {"updated": 1}
+        assert await prices(ac, [inside, outside]) == [(30.0, 40.0), (40.0, None)]
+
+        response = await ac.patch(f"/products/{outside['id']}/start-promotion", params={"discount": 10})
+        assert (response.json()["price"], response.json()["original_price"]) == (36.0, 40.0)
+        response = await ac.patch(f"/products/{outside['id']}/end-promotion")
+        assert (response.json()["price"], response.json()["original_price"]) == (40.0, None)
+
+        assert (await ac.post("/products/promotions", json={"discount": 10})).status_code == 400
+        assert (await ac.post(
+            "/products/promotions", json={"discount": 100, "category_id": category["id"]}
+        )).status_code == 422
+        assert (await ac.patch("/products/999999/start-promotion", params={"discount": 10})).status_code == 404
@@ -0,0 +1,153 @@
+import re
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import event, insert
+from app.db import models
+from app.db.database import SessionLocal, engine
+from app.services import products_service, sales_service, search_service
+from tests.test_api import unique_name
+
+# Tables a hot-path query must reach through an index, never a full scan
+HOT_TABLES = {"products", "sales", "sales_daily", "discounts", "subcategories"}
+SEED_PRODUCTS = 5000
+SEED_DAYS = 60
+
+@pytest.fixture(scope="module")
+def seed():
+    db = SessionLocal()
+    category = models.Category(name=unique_name("Plan Category"))
+    other_category = models.Category(name=unique_name("Plan Other Category"))
+    db.add_all([category, other_category])
+    db.flush()
+    subcategory = models.Subcategory(name=unique_name("Plan Subcategory"), category_id=category.id)
+    db.add(subcategory)
+    db.flush()
+
+    start = date.today() - timedelta(days=SEED_DAYS)
+    db.execute(insert(models.Product), [
+        {
+            "name": f"Plan Product {i}",
+            "category_id": category.id if i % 2 else other_category.id,
+            "subcategory_id": subcategory.id if i % 4 == 1 else None,
+            "price": float(1 + i % 97),
+            "stock": 0 if i % 10 == 0 else 5,
+            "reserved_quantity": 0,
+            "is_available": i % 10 != 0,
+            "sold_date": start + timedelta(days=i % SEED_DAYS) if i % 10 == 0 else None,
+        }
+        for i in range(SEED_PRODUCTS)
+    ])
+    product_ids = [
+        product_id for (product_id,) in
+        db.query(models.Product.id).filter(models.Product.category_id.in_([category.id, other_category.id]))
+    ]
+    sales_service.insert_sales(db, [
+        {
+            "product_id": product_id,
+            "actual_price": 10.0,
+            "discounted_price": 9.0,
+            "sale_date": start + timedelta(days=i % SEED_DAYS),
+        }
+        for i, product_id in enumerate(product_ids)
+    ])
+    db.commit()
+    analyze(db)
+    try:
+        yield {
+            "category_id": category.id,
+            "subcategory_id": subcategory.id,
+            "product_id": product_ids[0],
+            "start": start,
+        }
+    finally:
+        db.query(models.SalesDaily).filter(models.SalesDaily.product_id.in_(product_ids)).delete(synchronize_session=False)
+        db.query(models.Sale).filter(models.Sale.product_id.in_(product_ids)).delete(synchronize_session=False)
+        db.query(models.Product).filter(models.Product.id.in_(product_ids)).delete(synchronize_session=False)
+        db.query(models.Subcategory).filter(models.Subcategory.id == subcategory.id).delete(synchronize_session=False)
+        db.query(models.Category).filter(
+            models.Category.id.in_([category.id, other_category.id])
+        ).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def analyze(db):
+    cursor = db.connection().connection.cursor()
+    cursor.execute("ANALYZE")
+    cursor.close()
+    db.commit()
+
+def capture_statements(db, call):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+def _walk_pg_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_pg_plan(child)
+
+def sequential_scans(db, statement, parameters):
+    dialect = db.get_bind().dialect.name
+    cursor = db.connection().connection.cursor()
+    try:
+        if dialect == "postgresql":
+            # With seq scans priced out the planner only picks one when no index can serve the query
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0][0]["Plan"]
+            return [
+                node["Relation Name"] for node in _walk_pg_plan(plan)
+                if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in HOT_TABLES
+            ]
+        if dialect == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            scans = [re.match(r"SCAN (\w+)$", row[3]) for row in cursor.fetchall()]
+            return [match.group(1) for match in scans if match and match.group(1) in HOT_TABLES]
+        pytest.skip(f"No plan inspection for {dialect}")
+    finally:
+        cursor.close()
+
+def product_page_after_cursor(db, seed):
+    _, cursor = products_service.get_product_page(db, sort="price", category_id=seed["category_id"])
+    return products_service.get_product_page(db, sort="price", cursor=cursor, category_id=seed["category_id"])
+
+SERVICE_QUERIES = {
+    "products by category": lambda db, seed: products_service.get_product_page(db, category_id=seed["category_id"]),
+    "products by subcategory": lambda db, seed: products_service.get_product_page(db, subcategory_id=seed["subcategory_id"]),
+    "products by price cursor": product_page_after_cursor,
+    "sold products report": lambda db, seed: products_service.get_sold_products(
+        db, start_date=seed["start"], end_date=seed["start"] + timedelta(days=7), category_id=seed["category_id"]
+    ),
+    "sales report by day": lambda db, seed: sales_service.get_sales_report(
+        db, ["day"], start_date=seed["start"], end_date=seed["start"] + timedelta(days=7)
+    ),
+    "sales report by product in category": lambda db, seed: sales_service.get_sales_report(
+        db, ["product"], start_date=seed["start"], end_date=seed["start"] + timedelta(days=7),
+        category_id=seed["category_id"]
+    ),
+    "product detail": lambda db, seed: products_service.get_product_or_404(db, seed["product_id"]),
+    "product name substring search": lambda db, seed: search_service.search_products(
+        db, "Product 12", mode="substring", category_id=seed["category_id"]
+    ),
+    "product name prefix search": lambda db, seed: search_service.search_products(db, "plan prod", mode="prefix"),
+    "product name fuzzy search": lambda db, seed: search_service.search_products(db, "Prodct 123", mode="fuzzy"),
+}
+
+@pytest.mark.parametrize("name", list(SERVICE_QUERIES))
+def test_service_query_uses_indexes(seed, name):
+    with SessionLocal() as db:
+        statements = capture_statements(db, lambda session: SERVICE_QUERIES[name](session, seed))
+        assert statements
+        for statement, parameters in statements:
+            scans = sequential_scans(db, statement, parameters)
+            assert not scans, f"{name}: sequential scan on {scans} for\n{statement}"
+        db.rollback()
@@ -0,0 +1,104 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.core.config import settings, to_async_url
+from app.core.read_your_writes import PRIMARY_COOKIE, ReadYourWritesMiddleware
+from app.db import database, models
+from app.services.category_tree import category_tree
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+# Two local SQLite files stand in for the replicas; each holds one category the primary does not
+@pytest_asyncio.fixture
+async def replicas(tmp_path, monkeypatch):
+    names, factories, engines = [], [], []
+    for index in range(2):
+        url = f"sqlite:///{tmp_path / f'replica-{index}.db'}"
+        engine = create_engine(url)
+        models.Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            name = unique_name(f"Replica {index} Category")
+            db.add(models.Category(name=name))
+            db.commit()
+        names.append(name)
+        if settings.ASYNC_DB:
+            engine.dispose()
+            engine = create_async_engine(to_async_url(url))
+        factories.append(database.replica_sessionmaker(engine))
+        engines.append(engine)
+    monkeypatch.setattr(database, "ReplicaSessionLocals", factories)
+    yield names
+    for engine in engines:
+        if settings.ASYNC_DB:
+            await engine.dispose()
+        else:
+            engine.dispose()
+
+def client():
+    return AsyncClient(transport=ASGITransport(app=ReadYourWritesMiddleware(app, window=30)), base_url="http://test")
+
+@pytest.mark.asyncio
+async def test_reads_round_robin_over_replicas(replicas):
+    async with client() as ac:
+        seen = set()
+        for _ in range(2):
+            response = await ac.get("/categories/")
+            assert response.status_code == 200
+            seen.update(category["name"] for category in response.json())
+    assert seen == set(replicas)
+
+@pytest.mark.asyncio
+async def test_writes_go_to_the_primary_and_are_read_back_there(replicas):
+    async with client() as ac:
+        category = await create_test_category(ac, unique_name("Primary Category"))
+        product = await create_test_product(ac, unique_name("Primary Product"), category["id"])
+        assert PRIMARY_COOKIE in ac.cookies
+
+        # Inside the read-your-writes window the writer's reads stay on the primary
+        response = await ac.get("/products/", params={"category_id": category["id"]})
+        assert [row["id"] for row in response.json()] == [product["id"]]
+
+        # Once the window has closed its reads go back to the replicas, which never saw the write
+        ac.cookies.set(PRIMARY_COOKIE, "0")
+        response = await ac.get("/products/", params={"category_id": category["id"]})
+        assert response.json() == []
+
+    async with client() as ac:
+        response = await ac.get("/products/export", params={"category_id": category["id"]})
+        assert response.text == ""
+        assert {row["name"] for row in (await ac.get("/categories/")).json()} <= set(replicas)
+
+def replicate(product_id, replicas_dir, **values):
+    # What the replicas hold until they catch up: the row as it was before the client's write
+    for index in range(2):
+        engine = create_engine(f"sqlite:///{replicas_dir / f'replica-{index}.db'}")
+        with sessionmaker(bind=engine)() as db:
+            db.add(models.Product(id=product_id, **values))
+            db.commit()
+        engine.dispose()
+
+@pytest.mark.asyncio
+async def test_lagging_replica_reads_never_fill_the_caches(replicas, tmp_path):
+    async with client() as writer, client() as reader:
+        category = await create_test_category(writer, unique_name("Lag Category"))
+        product = await create_test_product(writer, unique_name("Lag Product"), category["id"], price=10.0)
+        replicate(
+            product["id"], tmp_path, name=product["name"], category_id=category["id"], price=10.0,
+            stock=product["stock"], reserved_quantity=0, is_available=True,
+        )
+
+        await writer.patch(f"/products/{product['id']}/price", json={"new_price": 20.0})
+        # Another client still reads the old price from a replica; it must not be cached...
+        assert (await reader.get(f"/products/{product['id']}")).json()["price"] == 10.0
+        # ...so the writer, inside its window, sees its own price
+        assert (await writer.get(f"/products/{product['id']}")).json()["price"] == 20.0
+
+        category_tree.invalidate()
+        tree = (await reader.get("/categories/tree")).json()
+        assert category["id"] not in [node["id"] for node in tree]
+        assert not category_tree.is_fresh()
+        tree = (await writer.get("/categories/tree")).json()
+        assert category["id"] in [node["id"] for node in tree]
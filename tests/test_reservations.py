@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import func, update
+from app.main import app
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.reservation_service import release_expired_reservations
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+def reservations_of(product_id):
+    with SessionLocal() as db:
+        return db.query(models.Reservation).filter(models.Reservation.product_id == product_id).all()
+
+def assert_consistent(product_id):
+    with SessionLocal() as db:
+        held = db.query(func.coalesce(func.sum(models.Reservation.quantity), 0)).filter(
+            models.Reservation.product_id == product_id
+        ).scalar()
+        assert db.get(models.Product, product_id).reserved_quantity == held
+
+@pytest.mark.asyncio
+async def test_reservations_are_recorded_and_consumed():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Reservation Category"))
+        product = await create_test_product(ac, unique_name("Reserved Product"), category["id"], stock=5)
+        product_id = product["id"]
+
+        await ac.post(f"/products/{product_id}/reserve", params={"holder": "alice"})
+        await ac.post("/products/cart/reserve", json={"items": [{"product_id": product_id, "quantity": 2}], "holder": "bob"})
+        holds = {hold.holder: hold for hold in reservations_of(product_id)}
+        assert holds["alice"].quantity == 1 and holds["bob"].quantity == 2
+        assert holds["bob"].expires_at > datetime.utcnow()
+
+        # Bob's sale consumes Bob's units, not Alice's older reservation
+        response = await ac.post(f"/products/{product_id}/sell", params={"holder": "bob"})
+        assert response.json()["reserved_quantity"] == 2
+        assert {hold.holder: hold.quantity for hold in reservations_of(product_id)} == {"alice": 1, "bob": 1}
+
+        await ac.delete(f"/products/{product_id}/cancel-reservation", params={"holder": "alice"})
+        assert [hold.holder for hold in reservations_of(product_id)] == ["bob"]
+        assert_consistent(product_id)
+
+@pytest.mark.asyncio
+async def test_sweeper_releases_expired_reservations_in_batches():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Sweep Category"))
+        products = [
+            await create_test_product(ac, unique_name("Sweep Product"), category["id"], stock=10)
+            for _ in range(3)
+        ]
+        for product in products:
+            for _ in range(2):
+                await ac.post(f"/products/{product['id']}/reserve")
+        # One reservation stays live
+        await ac.post(f"/products/{products[0]['id']}/reserve", params={"holder": "live"})
+
+    product_ids = [product["id"] for product in products]
+    now = datetime.utcnow() + timedelta(seconds=1)
+    with SessionLocal() as db:
+        db.execute(
+            update(models.Reservation)
+            .where(models.Reservation.product_id.in_(product_ids), models.Reservation.holder.is_(None))
+            .values(expires_at=now - timedelta(minutes=1))
+        )
+        db.commit()
+        # Bounded: two batches of two leave the last two expired reservations for the next sweep
+        first = release_expired_reservations(db, now=now, batch_size=2, max_batches=2)
+        assert first == {"reservations": 4, "units": 4, "batches": 2}
+        second = release_expired_reservations(db, now=now, batch_size=2, max_batches=2)
+        assert second["reservations"] == 2
+
+        reserved = dict(db.query(models.Product.id, models.Product.reserved_quantity).filter(models.Product.id.in_(product_ids)))
+    assert reserved == {product_ids[0]: 1, product_ids[1]: 0, product_ids[2]: 0}
+    for product_id in product_ids:
+        assert_consistent(product_id)
+
+@pytest.mark.asyncio
+async def test_reserved_quantity_matches_reservations_under_contention():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Contention Category"))
+        product = await create_test_product(ac, unique_name("Contended Product"), category["id"], stock=100)
+        product_id = product["id"]
+
+        async def shopper(index):
+            await ac.post(f"/products/{product_id}/reserve")
+            if index % 3:
+                await ac.post(f"/products/{product_id}/sell")
+            else:
+                await ac.delete(f"/products/{product_id}/cancel-reservation")
+
+        await asyncio.gather(*(shopper(index) for index in range(24)))
+    assert_consistent(product_id)
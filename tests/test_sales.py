@@ -0,0 +1,80 @@
+import json
+import pytest
+from datetime import date
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.sales_service import backfill_sales_daily
+from tests.test_api import create_test_category, unique_name, create_test_product
+
+@pytest.mark.asyncio
+async def test_sales_report_aggregates_in_database():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, name=unique_name("Report Category"))
+        product = await create_test_product(ac, name="Report Product", category_id=category["id"], price=25.0)
+        cart = {"items": [{"product_id": product["id"], "quantity": 3}]}
+        assert (await ac.post("/products/cart/reserve", json=cart)).status_code == 200
+        assert (await ac.post("/products/cart/sell", json=cart)).status_code == 200
+
+        response = await ac.get("/sales/report", params={
+            "group_by": ["day", "product"],
+            "category_id": category["id"],
+            "start_date": date.today().isoformat(),
+        })
+        assert response.status_code == 200
+        assert response.json() == [{
+            "day": date.today().isoformat(),
+            "product_id": product["id"],
+            "units": 3,
+            "gross_revenue": 75.0,
+            "net_revenue": 75.0,
+        }]
+
+@pytest.mark.asyncio
+async def test_export_products_and_sales():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, name=unique_name("Export Category"))
+        product = await create_test_product(ac, name="Export Product", category_id=category["id"], price=12.5, stock=2)
+        await ac.post(f"/products/{product['id']}/reserve")
+        await ac.post(f"/products/{product['id']}/sell")
+
+        catalog = await ac.get("/products/export", params={"category_id": category["id"]})
+        assert catalog.status_code == 200
+        assert catalog.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in catalog.text.splitlines()]
+        assert [(row["id"], row["stock"]) for row in rows] == [(product["id"], 1)]
+
+        sales = await ac.get("/sales/export", params={"format": "csv", "category_id": category["id"]})
+        assert sales.status_code == 200
+        lines = sales.text.splitlines()
+        assert lines[0] == "id,product_id,category_id,subcategory_id,actual_price,discounted_price,sale_date"
+        assert len(lines) == 2
+        assert lines[1].split(",")[1] == str(product["id"])
+
+@pytest.mark.asyncio
+async def test_sales_rollup_is_maintained_and_backfilled():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, name=unique_name("Rollup Category"))
+        product = await create_test_product(ac, name="Rollup Product", category_id=category["id"], price=10.0)
+        cart = {"items": [{"product_id": product["id"], "quantity": 2}]}
+        await ac.post("/products/cart/reserve", json=cart)
+        await ac.post("/products/cart/sell", json=cart)
+        await ac.post(f"/products/{product['id']}/reserve")
+        await ac.post(f"/products/{product['id']}/sell")
+
+    def rollup():
+        with SessionLocal() as db:
+            return [
+                (row.sale_date, row.category_id, row.units, row.gross_revenue)
+                for row in db.query(models.SalesDaily).filter(models.SalesDaily.product_id == product["id"])
+            ]
+
+    # Three sales, one rollup row accumulated incrementally by both sell paths
+    expected = [(date.today(), category["id"], 3, 30.0)]
+    assert rollup() == expected
+    with SessionLocal() as db:
+        db.query(models.SalesDaily).filter(models.SalesDaily.product_id == product["id"]).delete()
+        db.commit()
+        assert backfill_sales_daily(db, start_date=date.today(), end_date=date.today()) >= 1
+    assert rollup() == expected
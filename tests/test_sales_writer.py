@@ -0,0 +1,180 @@
+import fcntl
+import json
+import os
+import threading
+import time
+import pytest
+from datetime import date
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import func
+from app.main import app
+from app.db import models
+from app.db.database import SessionLocal
+from app.services import sales_writer as sales_writer_module
+from app.services.sales_writer import SaleWriter
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+def sales_of(product_id):
+    with SessionLocal() as db:
+        return db.query(models.Sale).filter(models.Sale.product_id == product_id).count()
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    writer = SaleWriter(str(tmp_path / "sales.ndjson"), flush_size=1000, flush_interval=60, enabled=True)
+    monkeypatch.setattr(sales_writer_module, "sales_writer", writer)
+    yield writer
+    writer.close()
+
+async def sell(ac, product_id, times=1):
+    for _ in range(times):
+        await ac.post(f"/products/{product_id}/reserve")
+        response = await ac.post(f"/products/{product_id}/sell")
+        assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_sales_are_queued_and_flushed_in_a_batch(writer):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Write Behind Category"))
+        product = await create_test_product(ac, unique_name("Write Behind Product"), category["id"], stock=5)
+        await sell(ac, product["id"], times=2)
+        # A rejected sale rolls back and queues nothing
+        response = await ac.post(f"/products/{product['id']}/sell")
+        assert response.status_code == 400
+
+    assert sales_of(product["id"]) == 0
+    with open(writer.path) as spill:
+        assert [json.loads(line)["product_id"] for line in spill] == [product["id"]] * 2
+
+    assert writer.flush() == 2
+    assert sales_of(product["id"]) == 2
+    assert writer.pending == 0
+    with open(writer.path) as spill:
+        assert spill.read() == ""
+
+@pytest.mark.asyncio
+async def test_flush_size_triggers_background_flush(writer):
+    writer.flush_size = 2
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Flush Size Category"))
+        product = await create_test_product(ac, unique_name("Flush Size Product"), category["id"], stock=5)
+        await sell(ac, product["id"], times=2)
+
+    deadline = time.monotonic() + 5
+    while sales_of(product["id"]) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert sales_of(product["id"]) == 2
+
+@pytest.mark.asyncio
+async def test_spill_is_synced_off_the_calling_thread(tmp_path, monkeypatch):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Sync Category"))
+        product = await create_test_product(ac, unique_name("Sync Product"), category["id"])
+
+    synced = []
+    real_fsync = os.fsync
+    def fsync(fd):
+        synced.append(threading.current_thread().name)
+        real_fsync(fd)
+    monkeypatch.setattr(os, "fsync", fsync)
+
+    writer = SaleWriter(str(tmp_path / "sales.ndjson"), flush_size=1000, flush_interval=60, enabled=True)
+    writer.start()
+    writer.enqueue([{"product_id": product["id"], "actual_price": 1.0, "discounted_price": None, "sale_date": date.today()}])
+    assert threading.current_thread().name not in synced
+    deadline = time.monotonic() + 5
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert synced == ["sales-writer"]
+    writer.close()
+    assert sales_of(product["id"]) == 1
+
+def spill_record(product_id):
+    return json.dumps({"product_id": product_id, "actual_price": 10.0, "discounted_price": None, "sale_date": date.today().isoformat()})
+
+@pytest.mark.asyncio
+async def test_spilled_sales_are_recovered_on_start(tmp_path):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Spill Category"))
+        product = await create_test_product(ac, unique_name("Spill Product"), category["id"])
+
+    record = spill_record(product["id"])
+    # A worker that exited left one batch caught mid-flush, one row in its live file and a torn final append
+    (tmp_path / "sales.ndjson.41.lock").touch()
+    (tmp_path / "sales.ndjson.41.0.flushing").write_text(record + "\n" + record + "\n")
+    (tmp_path / "sales.ndjson.41").write_text(record + "\n" + '{"product_id": ')
+
+    writer = SaleWriter(str(tmp_path / "sales.ndjson"), enabled=True)
+    assert writer.start() == 3
+    assert writer.path.endswith(f".{os.getpid()}")
+    writer.close()
+    assert sales_of(product["id"]) == 3
+    # Only the shared recovery lock is left once everything is flushed
+    assert [path.name for path in tmp_path.iterdir()] == ["sales.ndjson.lock"]
+
+@pytest.mark.asyncio
+async def test_recovery_leaves_running_workers_files_alone(tmp_path):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Live Spill Category"))
+        product = await create_test_product(ac, unique_name("Live Spill Product"), category["id"])
+
+    record = spill_record(product["id"])
+    (tmp_path / "sales.ndjson.41").write_text(record + "\n")
+    (tmp_path / "sales.ndjson.41.0.flushing").write_text(record + "\n")
+    with open(tmp_path / "sales.ndjson.41.lock", "a") as live:
+        # Another worker still running holds its lock
+        fcntl.flock(live, fcntl.LOCK_EX)
+        writer = SaleWriter(str(tmp_path / "sales.ndjson"), enabled=True)
+        assert writer.start() == 0
+        writer.close()
+
+    assert sales_of(product["id"]) == 0
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "sales.ndjson.41", "sales.ndjson.41.0.flushing", "sales.ndjson.41.lock", "sales.ndjson.lock",
+    ]
+
+@pytest.mark.asyncio
+async def test_replaying_a_committed_spill_file_adds_nothing(tmp_path):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Replay Category"))
+        product = await create_test_product(ac, unique_name("Replay Product"), category["id"])
+
+    records = "".join(
+        json.dumps({**json.loads(spill_record(product["id"])), "record_id": record_id}) + "\n"
+        for record_id in ("a" * 32, "b" * 32)
+    )
+    # The same batch found twice, as after a crash between its commit and the file's removal
+    for _ in range(2):
+        (tmp_path / "sales.ndjson.41.lock").touch()
+        (tmp_path / "sales.ndjson.41.0.flushing").write_text(records)
+        writer = SaleWriter(str(tmp_path / "sales.ndjson"), enabled=True)
+        assert writer.start() == 2
+        writer.close()
+
+    assert sales_of(product["id"]) == 2
+    with SessionLocal() as db:
+        units = db.query(func.sum(models.SalesDaily.units)).filter(models.SalesDaily.product_id == product["id"]).scalar()
+    assert units == 2
+
+@pytest.mark.asyncio
+async def test_rows_the_database_refuses_are_set_aside(tmp_path):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Poison Category"))
+        product = await create_test_product(ac, unique_name("Poison Product"), category["id"])
+
+    good = {"product_id": product["id"], "actual_price": 10.0, "discounted_price": None, "sale_date": date.today()}
+    # actual_price is NOT NULL, so this row can never be inserted
+    poison = {**good, "actual_price": None}
+    writer = SaleWriter(str(tmp_path / "sales.ndjson"), flush_size=1000, flush_interval=60, enabled=True)
+    writer.start()
+    writer.enqueue([good, good, poison, good])
+    assert writer.flush() == 3
+    assert (writer.pending, writer.flushed, writer.rejected) == (0, 3, 1)
+    assert sales_of(product["id"]) == 3
+
+    # The queue keeps moving behind it
+    writer.enqueue([good])
+    assert writer.flush() == 1
+    writer.close()
+    assert sales_of(product["id"]) == 4
+    [rejected] = (tmp_path / "sales.ndjson.rejected").read_text().splitlines()
+    assert json.loads(rejected)["actual_price"] is None
@@ -0,0 +1,52 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+NAMES = ["Gaming Laptop Pro", "Laptop Stand", "Desk Lamp", "Lapland Map", "100% Cotton Shirt"]
+
+async def seed_catalog(ac):
+    category = await create_test_category(ac, unique_name("Search Category"))
+    other = await create_test_category(ac, unique_name("Search Other"))
+    for name in NAMES:
+        await create_test_product(ac, name, category["id"])
+    await create_test_product(ac, "Laptop Sleeve", other["id"])
+    return category, other
+
+async def search(ac, q, mode, category_id, **params):
+    response = await ac.get("/products/search", params={"q": q, "mode": mode, "category_id": category_id, **params})
+    assert response.status_code == 200
+    return [product["name"] for product in response.json()], response.headers.get("X-Next-Cursor")
+
+@pytest.mark.asyncio
+async def test_search_modes():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category, other = await seed_catalog(ac)
+        names, _ = await search(ac, "gam lap", "prefix", category["id"])
+        assert names == ["Gaming Laptop Pro"]
+        names, _ = await search(ac, "lap", "prefix", category["id"])
+        assert set(names) == {"Gaming Laptop Pro", "Laptop Stand", "Lapland Map"}
+        names, _ = await search(ac, "top", "substring", category["id"])
+        assert set(names) == {"Gaming Laptop Pro", "Laptop Stand"}
+        names, _ = await search(ac, "100%", "substring", category["id"])
+        assert names == ["100% Cotton Shirt"]
+        # A typo still finds the laptops, ranked ahead of weaker matches
+        names, _ = await search(ac, "laptp", "fuzzy", category["id"])
+        assert set(names[:2]) == {"Gaming Laptop Pro", "Laptop Stand"}
+        # Filters combine with the text match
+        names, _ = await search(ac, "laptop", "substring", other["id"])
+        assert names == ["Laptop Sleeve"]
+
+@pytest.mark.asyncio
+async def test_search_pages_with_cursor():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category, _ = await seed_catalog(ac)
+        first, cursor = await search(ac, "lap", "substring", category["id"], limit=2)
+        assert len(first) == 2 and cursor
+        rest, last_cursor = await search(ac, "lap", "substring", category["id"], limit=2, cursor=cursor)
+        assert last_cursor is None
+        assert set(first + rest) == {"Gaming Laptop Pro", "Laptop Stand", "Lapland Map"}
+
+        # A cursor only continues the search it came from
+        response = await ac.get("/products/search", params={"q": "top", "category_id": category["id"], "cursor": cursor})
+        assert response.status_code == 400
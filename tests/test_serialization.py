@@ -0,0 +1,34 @@
+import json
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.serialization import RowSerializer
+from app.schemas import ProductResponse
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+ROW = (7, "Lamp", 3, 19.5, 4, 1, True, None)
+
+def test_row_serializer_paths_agree():
+    validated = RowSerializer(ProductResponse)
+    plain = RowSerializer(ProductResponse, validate=False)
+    expected = [{
+        "id": 7, "name": "Lamp", "category_id": 3, "price": 19.5,
+        "stock": 4, "reserved_quantity": 1, "is_available": True, "original_price": None,
+    }]
+    assert json.loads(validated.dump_json([ROW])) == expected
+    assert json.loads(plain.dump_json([ROW])) == expected
+
+def test_validating_serializer_coerces_to_schema():
+    # Integer prices from the driver come out as floats, as the ORM path produced
+    body = RowSerializer(ProductResponse).dump_json([(1, "Pen", 1, 2, 5, 0, True, None)])
+    assert json.loads(body)[0]["price"] == 2.0
+
+@pytest.mark.asyncio
+async def test_product_list_matches_detail_representation():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Serialized Category"))
+        product = await create_test_product(ac, unique_name("Serialized Product"), category["id"])
+        response = await ac.get("/products/", params={"category_id": category["id"]})
+        assert response.headers["content-type"] == "application/json"
+        detail = await ac.get(f"/products/{product['id']}")
+    assert response.json() == [detail.json()]
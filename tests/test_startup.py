@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+from app.db.migrations import SCHEMA_REVISION, SchemaMismatchError, check_schema
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_schema_revision_matches_alembic_head():
+    config = Config()
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    assert ScriptDirectory.from_config(config).get_current_head() == SCHEMA_REVISION
+
+def test_check_schema_compares_stamped_revision(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    assert check_schema(bind) is False
+    with pytest.raises(SchemaMismatchError):
+        check_schema(bind, strict=True)
+
+    with bind.begin() as connection:
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        connection.execute(text("INSERT INTO alembic_version VALUES (:revision)"), {"revision": SCHEMA_REVISION})
+    assert check_schema(bind, strict=True) is True
+    bind.dispose()
+
+def test_import_does_not_touch_the_database():
+    # An unreachable database must not stop the app from importing
+    env = dict(os.environ, DATABASE_URL="sqlite:////nonexistent-dir/store.db", ASYNC_DB="0")
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.main"], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import func, update
+from app.main import app
+from app.db import models
+from app.db.database import SessionLocal
+from app.services import products_service
+from app.services.reservation_service import release_expired_reservations
+from tests.test_api import unique_name, create_test_category, create_test_product
+
+def slots_of(product_id):
+    with SessionLocal() as db:
+        return {
+            shard.slot: (shard.stock, shard.reserved_quantity)
+            for shard in db.query(models.StockShard).filter(models.StockShard.product_id == product_id)
+        }
+
+def assert_slots_match_reservations(product_id):
+    with SessionLocal() as db:
+        held = dict(
+            db.query(models.Reservation.slot, func.sum(models.Reservation.quantity))
+            .filter(models.Reservation.product_id == product_id)
+            .group_by(models.Reservation.slot)
+        )
+    reserved = {slot: slot_reserved for slot, (_, slot_reserved) in slots_of(product_id).items() if slot_reserved}
+    assert reserved == held
+
+async def shard(ac, product_id, shards):
+    response = await ac.patch(f"/products/{product_id}/stock-shards", params={"shards": shards})
+    assert response.status_code == 200
+    return response.json()
+
+@pytest.mark.asyncio
+async def test_sharded_stock_is_split_and_summed_for_reads():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Shard Category"))
+        product = await create_test_product(ac, unique_name("Shard Product"), category["id"], stock=10)
+        product_id = product["id"]
+        await ac.post(f"/products/{product_id}/reserve")
+
+        sharded = await shard(ac, product_id, 4)
+        assert (sharded["stock"], sharded["reserved_quantity"]) == (10, 1)
+        # Free units spread evenly, the existing reservation moves to slot 0 with its unit
+        assert slots_of(product_id) == {0: (4, 1), 1: (2, 0), 2: (2, 0), 3: (2, 0)}
+        assert_slots_match_reservations(product_id)
+
+        # A cart larger than any one slot gathers units from several
+        cart = {"items": [{"product_id": product_id, "quantity": 6}]}
+        response = await ac.post("/products/cart/reserve", json=cart)
+        assert response.json()[0]["reserved_quantity"] == 7
+        assert_slots_match_reservations(product_id)
+
+        listed = (await ac.get("/products/", params={"category_id": category["id"]})).json()
+        assert [(row["stock"], row["reserved_quantity"]) for row in listed] == [(10, 7)]
+        detail = (await ac.get(f"/products/{product_id}")).json()
+        assert (detail["stock"], detail["reserved_quantity"]) == (10, 7)
+
+        response = await ac.post("/products/cart/sell", json=cart)
+        assert [(row["stock"], row["reserved_quantity"]) for row in response.json()] == [(4, 1)]
+        response = await ac.delete(f"/products/{product_id}/cancel-reservation")
+        assert response.json()["reserved_quantity"] == 0
+
+        # Folding back puts the totals on the product row again
+        unsharded = await shard(ac, product_id, 0)
+        assert (unsharded["stock"], unsharded["reserved_quantity"]) == (4, 0)
+        assert slots_of(product_id) == {}
+
+@pytest.mark.asyncio
+async def test_sharded_product_sells_out_under_contention():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Shard Rush Category"))
+        product = await create_test_product(ac, unique_name("Shard Rush Product"), category["id"], stock=12)
+        product_id = product["id"]
+        await shard(ac, product_id, 3)
+
+        async def buyer():
+            if (await ac.post(f"/products/{product_id}/reserve")).status_code == 200:
+                return (await ac.post(f"/products/{product_id}/sell")).status_code == 200
+            return False
+
+        sold = await asyncio.gather(*(buyer() for _ in range(16)))
+        assert sum(sold) == 12
+        detail = (await ac.get(f"/products/{product_id}")).json()
+        assert (detail["stock"], detail["reserved_quantity"], detail["is_available"]) == (0, 0, False)
+
+    with SessionLocal() as db:
+        assert db.query(models.Sale).filter(models.Sale.product_id == product_id).count() == 12
+
+@pytest.mark.asyncio
+async def test_concurrent_sharded_sells_roll_up_into_separate_rows():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Shard Rollup Category"))
+        product = await create_test_product(ac, unique_name("Shard Rollup Product"), category["id"], price=5.0, stock=9)
+        product_id = product["id"]
+        await shard(ac, product_id, 3)
+
+        async def buyer():
+            assert (await ac.post(f"/products/{product_id}/reserve")).status_code == 200
+            assert (await ac.post(f"/products/{product_id}/sell")).status_code == 200
+
+        await asyncio.gather(*(buyer() for _ in range(9)))
+
+        # Each sell upserted the rollup row of the slot it held, never one shared product row
+        with SessionLocal() as db:
+            rollup = dict(
+                db.query(models.SalesDaily.slot, models.SalesDaily.units)
+                .filter(models.SalesDaily.product_id == product_id)
+            )
+        assert rollup == {0: 3, 1: 3, 2: 3}
+
+        response = await ac.get("/sales/report", params={"group_by": ["product"], "category_id": category["id"]})
+        assert response.json() == [{"product_id": product_id, "units": 9, "gross_revenue": 45.0, "net_revenue": 45.0}]
+
+@pytest.mark.asyncio
+async def test_holderless_sells_start_from_a_random_slot(monkeypatch):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Shard Claim Category"))
+        product = await create_test_product(ac, unique_name("Shard Claim Product"), category["id"], stock=9)
+        product_id = product["id"]
+        await shard(ac, product_id, 3)
+        cart = {"items": [{"product_id": product_id, "quantity": 1}]}
+        while {slot for slot, (_, reserved) in slots_of(product_id).items() if reserved} != {0, 1, 2}:
+            await ac.post("/products/cart/reserve", json=cart)
+
+        with SessionLocal() as db:
+            oldest = db.query(models.Reservation).filter(models.Reservation.product_id == product_id).order_by(
+                models.Reservation.expires_at, models.Reservation.id
+            ).first().slot
+        target = (oldest + 1) % 3
+        # Slots are visited from (slot + offset) % shards == 0, so this offset starts at `target`
+        monkeypatch.setattr(products_service.random, "randrange", lambda stop: (3 - target) % 3)
+        before = slots_of(product_id)
+        assert (await ac.post(f"/products/{product_id}/sell")).status_code == 200
+
+        after = slots_of(product_id)
+        assert [slot for slot in before if before[slot] != after[slot]] == [target]
+        assert_slots_match_reservations(product_id)
+
+@pytest.mark.asyncio
+async def test_sweeper_returns_expired_units_to_their_slots():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Shard Sweep Category"))
+        product = await create_test_product(ac, unique_name("Shard Sweep Product"), category["id"], stock=6)
+        product_id = product["id"]
+        await shard(ac, product_id, 2)
+        for _ in range(3):
+            await ac.post(f"/products/{product_id}/reserve")
+
+    now = datetime.utcnow() + timedelta(seconds=1)
+    with SessionLocal() as db:
+        db.execute(
+            update(models.Reservation)
+            .where(models.Reservation.product_id == product_id)
+            .values(expires_at=now - timedelta(minutes=1))
+        )
+        db.commit()
+        assert release_expired_reservations(db, now=now)["units"] == 3
+    assert all(reserved == 0 for _, reserved in slots_of(product_id).values())
+    assert_slots_match_reservations(product_id)
+
+@pytest.mark.asyncio
+async def test_import_rejects_sharded_products():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        category = await create_test_category(ac, unique_name("Shard Import Category"))
+        product = await create_test_product(ac, unique_name("Shard Import Product"), category["id"], stock=10)
+        await shard(ac, product["id"], 2)
+
+        feed = json.dumps({"name": product["name"], "category_id": category["id"], "price": 5, "stock": 3})
+        report = (await ac.post("/products/import", content=feed)).json()
+        assert (report["updated"], report["failed"]) == (0, 1)
+        assert "sharded" in report["batches"][0]["errors"][0]["error"]
+        detail = (await ac.get(f"/products/{product['id']}")).json()
+        assert (detail["stock"], detail["price"]) == (10, product["price"])